@@ -10,14 +10,42 @@ Date: September 2025
 """
 
 import os
-from typing import List, Dict, Optional
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import List, Dict, Optional, NamedTuple, Union
 from dataclasses import dataclass
 
 from google import genai
+from google.genai import errors as genai_errors
 from dotenv import load_dotenv
+from json_utils import json_loads
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Same fenced-block pattern the orchestrator uses in llm.parse_llm_response
+JSON_BLOCK_PATTERN = re.compile(r"```json\n(.*?)\n```", re.DOTALL)
+JSON_OBJECT_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+# Gemini JSON-mode configs so responses decode with json.loads instead of text parsing
+INTENT_RESPONSE_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "OBJECT",
+        "properties": {"thread_ids": {"type": "ARRAY", "items": {"type": "STRING"}}},
+        "required": ["thread_ids"],
+    },
+}
+MULTI_INTENT_RESPONSE_CONFIG = {"response_mime_type": "application/json"}
+
 
 # ==================== DATA CLASSES ====================
 
@@ -32,6 +60,76 @@ class AnalysisResult:
     error_message: Optional[str] = None
 
 
+class AnalyzedEmail(NamedTuple):
+    """Email fields used by the analyzer, normalized once from objects or dicts."""
+    thread_id: str
+    subject: str
+    sender: str
+    date: str
+    content: str
+
+
+def _normalize_email(email, idx: int) -> AnalyzedEmail:
+    """Normalize an EmailSummary object or dictionary into an AnalyzedEmail."""
+    if isinstance(email, AnalyzedEmail):
+        return email
+    try:
+        if hasattr(email, 'thread_id'):
+            # EmailSummary object
+            return AnalyzedEmail(email.thread_id, email.subject, email.sender, email.date,
+                                 email.content_preview or "")
+        # Dictionary or other format
+        return AnalyzedEmail(
+            email.get('thread_id', f'thread_{idx}'),
+            email.get('subject', 'No subject'),
+            email.get('sender', 'Unknown sender'),
+            email.get('date', 'Unknown date'),
+            email.get('content_preview', '') or ""
+        )
+    except Exception as e:
+        print(f"⚠️ Error processing email {idx}: {e}")
+        return AnalyzedEmail(f'email_error_{idx}', 'Error processing email', 'Unknown', 'Unknown',
+                             'Could not process email data')
+
+
+def normalize_emails(emails: List) -> List[AnalyzedEmail]:
+    """Normalize a batch of emails so downstream helpers need no per-email type checks."""
+    return [_normalize_email(email, idx) for idx, email in enumerate(emails)]
+
+
+# ==================== KEYWORD MATCHING ====================
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=128)
+def _compile_intent_keywords(intent: str):
+    """
+    Extract fallback keywords from an intent and prepare them for matching.
+    
+    Plain-word keywords are matched against the email's token set; keywords
+    containing punctuation (e.g. "amazon.com") go into one alternation regex.
+    Cached per intent so repeated fallbacks reuse the prepared matchers.
+    
+    Returns:
+        Tuple of (keywords, frozenset of word keywords, compiled pattern or None)
+    """
+    # Extract keywords from the intent itself
+    intent_words = intent.lower().replace('_', ' ').split()
+    keywords = tuple(dict.fromkeys(word for word in intent_words if len(word) > 2))  # Filter short words
+    
+    word_keywords = frozenset(keyword for keyword in keywords if WORD_PATTERN.fullmatch(keyword))
+    other_keywords = [keyword for keyword in keywords if keyword not in word_keywords]
+    if not other_keywords:
+        return keywords, word_keywords, None
+    
+    # Longest first so a keyword is not shadowed by its own prefix
+    pattern = re.compile(
+        "|".join(re.escape(keyword) for keyword in sorted(other_keywords, key=len, reverse=True))
+    )
+    return keywords, word_keywords, pattern
+
+
 # ==================== UNIVERSAL AI ANALYSIS ENGINE ====================
 
 class UniversalEmailAnalyzer:
@@ -42,19 +140,144 @@ class UniversalEmailAnalyzer:
     and classify emails for ANY intent the user specifies.
     """
     
-    def __init__(self, gemini_client: genai.Client, gmail_client):
-        """Initialize the analyzer with required clients."""
-        self.gemini_client = gemini_client
+    # Upper bound on in-flight Gemini requests to stay within API quota
+    MAX_CONCURRENT_REQUESTS = 8
+    
+    # Number of Gemini responses kept for repeated (intent, email batch) queries
+    RESPONSE_CACHE_SIZE = 512
+    
+    # Gemini model and lifetime of server-side cached email blocks
+    MODEL = "gemini-2.0-flash"
+    EMAIL_CACHE_TTL = "300s"
+    
+    # Smallest context Gemini will cache for MODEL, and the rough prompt
+    # characters per token used to estimate an email block's size
+    MIN_CACHE_TOKENS = 4096
+    CHARS_PER_TOKEN = 4
+    
+    def __init__(self, gemini_client: Union[genai.Client, str], gmail_client):
+        """
+        Initialize the analyzer with required clients.
+        
+        gemini_client may also be an API key; async calls then use the
+        client shared on the running event loop (see get_shared_gemini_client).
+        """
+        if isinstance(gemini_client, str):
+            self.gemini_client, self.gemini_api_key = None, gemini_client
+        else:
+            self.gemini_client, self.gemini_api_key = gemini_client, None
         self.gmail_client = gmail_client
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._response_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._context_cache_rejected = False
     
-    def analyze_emails_for_intent(self, emails: List, intent: str) -> AnalysisResult:
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the request semaphore bound to the currently running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    @property
+    def aio(self):
+        """Get the async Gemini client: the given client's, or the running event loop's shared one."""
+        if self.gemini_client is not None:
+            return self.gemini_client.aio
+        return get_shared_gemini_client(self.gemini_api_key).aio
+    
+    async def _acall_gemini(self, prompt: str, config: Optional[dict] = None):
+        """Send a prompt to Gemini without blocking the event loop."""
+        async with self._get_semaphore():
+            return await self.aio.models.generate_content(
+                model=self.MODEL,
+                contents=[{"parts": [{"text": prompt}]}],
+                config=config
+            )
+    
+    @asynccontextmanager
+    async def prepare_batch(self, emails: List):
+        """
+        Upload the email block once as Gemini cached content for several intent calls.
+        
+        Yields the cached content name to pass to analyze_emails_for_intent, or None
+        if the cache is not worth creating, in which case callers send the full
+        prompt. Blocks estimated below MIN_CACHE_TOKENS are not uploaded, and once
+        Gemini rejects a cache request no further ones are attempted.
+        The cache is deleted on exit.
+        """
+        email_block = self._format_email_block(emails)
+        if (self._context_cache_rejected
+                or len(email_block) < self.MIN_CACHE_TOKENS * self.CHARS_PER_TOKEN):
+            yield None
+            return
+        
+        try:
+            cache = await self.aio.caches.create(
+                model=self.MODEL,
+                config={
+                    "contents": [{"role": "user", "parts": [{"text": f"EMAILS TO ANALYZE:\n{email_block}"}]}],
+                    "ttl": self.EMAIL_CACHE_TTL,
+                }
+            )
+        except Exception as e:
+            # A 4xx means this model or key cannot cache contexts; don't ask again
+            if isinstance(e, genai_errors.ClientError):
+                self._context_cache_rejected = True
+            logger.debug("Gemini context cache unavailable, sending full prompts: %s", e)
+            yield None
+            return
+        
+        try:
+            yield cache.name
+        finally:
+            try:
+                await self.aio.caches.delete(name=cache.name)
+            except Exception as e:
+                logger.debug("Could not delete Gemini context cache %s: %s", cache.name, e)
+    
+    def _cache_key(self, emails: List[AnalyzedEmail], intent: str) -> tuple:
+        """
+        Build a response cache key from the normalized intent and the email batch.
+        
+        The batch is hashed as the formatted email block, so any field the
+        prompt shows Gemini (sender, date, content preview) changes the key.
+        """
+        digest = hashlib.blake2b(self._format_email_block(emails).encode(), digest_size=16)
+        return (intent.lower().strip(), digest.hexdigest())
+    
+    def _get_cached_response(self, key: tuple) -> Optional[str]:
+        """Return a cached Gemini response text, marking it as recently used."""
+        response_text = self._response_cache.get(key)
+        if response_text is not None:
+            self._response_cache.move_to_end(key)
+        return response_text
+    
+    def _cache_response(self, key: tuple, response_text: str):
+        """Store a Gemini response text, evicting the least recently used entry."""
+        self._response_cache[key] = response_text
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def analyze_emails_for_intent_sync(self, emails: List, intent: str) -> AnalysisResult:
+        """Blocking wrapper around analyze_emails_for_intent for non-async callers."""
+        return _run_sync(self.analyze_emails_for_intent(emails, intent))
+    
+    async def analyze_emails_for_intent(self, emails: List, intent: str,
+                                        cached_content: Optional[str] = None) -> AnalysisResult:
         """
         Analyze emails for ANY specified intent using universal AI reasoning.
         
+        Being a coroutine, several intents can be analyzed concurrently:
+            await asyncio.gather(*[analyzer.analyze_emails_for_intent(emails, i) for i in intents])
+        
         Args:
             emails: List of email objects to analyze
             intent: ANY intent description (e.g., "SPAM", "URGENT", "CUSTOMER COMPLAINTS", 
                    "AMAZON ORDERS", "BIRTHDAY INVITATIONS", "WORK MEETINGS", etc.)
+            cached_content: Name of a Gemini cache holding these emails (see prepare_batch)
             
         Returns:
             AnalysisResult with classification details
@@ -69,40 +292,45 @@ class UniversalEmailAnalyzer:
             )
         
         print(f"🤖 Analyzing {len(emails)} emails for intent: {intent}")
+        emails = normalize_emails(emails)
         
         # Debug: Check the actual emails being passed
-        print(f"🔍 Email Analysis Debug:")
-        print(f"  - Emails type: {type(emails)}")
-        print(f"  - Emails length: {len(emails)}")
-        if emails:
-            print(f"  - First email type: {type(emails[0])}")
-            print(f"  - First email attributes: {dir(emails[0])[:10]}...")  # First 10 attributes
-            if hasattr(emails[0], 'subject'):
-                print(f"  - Sample subjects: {[e.subject[:50] for e in emails[:3]]}")
-            if hasattr(emails[0], 'thread_id'):
-                print(f"  - Sample thread IDs: {[e.thread_id for e in emails[:3]]}")
-        print()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Email Analysis Debug:")
+            logger.debug(f"  - Emails length: {len(emails)}")
+            logger.debug(f"  - Sample subjects: {[e.subject[:50] for e in emails[:3]]}")
+            logger.debug(f"  - Sample thread IDs: {[e.thread_id for e in emails[:3]]}")
         
         try:
-            # Generate universal AI prompt for ANY intent
-            analysis_prompt = self._create_universal_prompt(emails, intent)
+            email_index = self._index_emails(emails)
+            cache_key = self._cache_key(emails, intent)
+            response_text = self._get_cached_response(cache_key)
             
-            # Call Gemini AI
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[{"parts": [{"text": analysis_prompt}]}]
-            )
+            if response_text is None:
+                if cached_content:
+                    # Emails are already in the cached context, send only the instruction
+                    analysis_prompt = self._create_universal_prompt(None, intent)
+                    config = {**INTENT_RESPONSE_CONFIG, "cached_content": cached_content}
+                else:
+                    # Generate universal AI prompt for ANY intent
+                    analysis_prompt = self._create_universal_prompt(emails, intent)
+                    config = INTENT_RESPONSE_CONFIG
+                
+                # Call Gemini AI
+                response = await self._acall_gemini(analysis_prompt, config)
+                response_text = response.text
+            else:
+                print(f"♻️ Reusing cached AI response for intent: {intent}")
             
-            # Debug: Print the AI response for troubleshooting
-            print(f"🔍 AI Response:")
-            print(f"{response.text}")
-            print()
+            # Debug: Log the AI response for troubleshooting
+            logger.debug("🔍 AI Response:\n%s", response_text)
             
             # Parse response and extract thread IDs
-            classified_thread_ids = self._parse_ai_response(response.text, emails)
+            classified_thread_ids = self._parse_ai_response(response_text, email_index)
+            self._cache_response(cache_key, response_text)
             
             # Display results
-            self._display_analysis_results(intent, classified_thread_ids, emails)
+            self._display_analysis_results(intent, classified_thread_ids, email_index)
             
             return AnalysisResult(
                 intent=intent,
@@ -127,193 +355,276 @@ class UniversalEmailAnalyzer:
                 error_message=str(e)
             )
     
-    def _create_universal_prompt(self, emails: List, intent: str) -> str:
-        """Create a universal AI prompt that can handle ANY intent."""
+    async def analyze_emails_in_chunks(self, emails: List, intent: str,
+                                       chunk_size: int = 10) -> AnalysisResult:
+        """
+        Analyze a large email list as concurrent chunk-sized requests and merge the results.
         
-        # Prepare email data - handle both EmailSummary objects and dictionaries
-        email_data = []
-        for idx, email in enumerate(emails):
-            try:
-                # Extract email information safely
-                if hasattr(email, 'thread_id'):
-                    # EmailSummary object
-                    thread_id = email.thread_id
-                    subject = email.subject
-                    sender = email.sender
-                    date = email.date
-                    content = email.content_preview[:400] if email.content_preview else ""
-                else:
-                    # Dictionary or other format
-                    thread_id = email.get('thread_id', f'thread_{idx}')
-                    subject = email.get('subject', 'No subject')
-                    sender = email.get('sender', 'Unknown sender')
-                    date = email.get('date', 'Unknown date')
-                    content = email.get('content_preview', '')[:400]
-                
-                email_data.append(f"""
-Email {idx + 1}:
-- Thread ID: {thread_id}
-- Subject: {subject}
-- From: {sender}
-- Date: {date}
-- Content: {content}...
-""")
-            except Exception as e:
-                print(f"⚠️ Error processing email {idx}: {e}")
-                # Create a fallback entry
-                email_data.append(f"""
-Email {idx + 1}:
-- Thread ID: email_error_{idx}
-- Subject: Error processing email
-- From: Unknown
-- Date: Unknown
-- Content: Could not process email data
-""")
+        Short parallel responses finish sooner than one long response covering
+        every email; concurrency is still bounded by MAX_CONCURRENT_REQUESTS.
+        
+        Args:
+            emails: List of email objects to analyze
+            intent: ANY intent description
+            chunk_size: Maximum number of emails per Gemini request
+            
+        Returns:
+            AnalysisResult merged across all chunks
+        """
+        if len(emails) <= chunk_size:
+            return await self.analyze_emails_for_intent(emails, intent)
+        
+        chunks = [emails[start:start + chunk_size] for start in range(0, len(emails), chunk_size)]
+        print(f"🧩 Splitting {len(emails)} emails into {len(chunks)} concurrent requests")
+        chunk_results = await asyncio.gather(
+            *[self.analyze_emails_for_intent(chunk, intent) for chunk in chunks]
+        )
+        
+        thread_ids = [thread_id for result in chunk_results for thread_id in result.thread_ids]
+        errors = [result.error_message for result in chunk_results if not result.success]
+        return AnalysisResult(
+            intent=intent,
+            total_emails=len(emails),
+            classified_emails=len(thread_ids),
+            thread_ids=thread_ids,
+            success=not errors,
+            error_message="; ".join(errors) if errors else None
+        )
+    
+    async def analyze_emails_for_intents(self, emails: List, intents: List[str]) -> Dict[str, AnalysisResult]:
+        """
+        Analyze emails for several intents with a single Gemini call.
+        
+        The email block is sent once instead of once per intent. If the batched
+        response cannot be parsed, each intent falls back to its own request.
+        
+        Args:
+            emails: List of email objects to analyze
+            intents: Intent descriptions to classify the emails against
+            
+        Returns:
+            Dictionary mapping each intent to its AnalysisResult
+        """
+        emails = normalize_emails(emails)
+        if not emails or len(intents) < 2:
+            return await self._analyze_each_intent(emails, intents)
+        
+        print(f"🤖 Analyzing {len(emails)} emails for {len(intents)} intents in one request")
+        
+        email_index = self._index_emails(emails)
+        
+        try:
+            cache_key = self._cache_key(emails, "\n".join(intents))
+            response_text = self._get_cached_response(cache_key)
+            if response_text is None:
+                response = await self._acall_gemini(
+                    self._create_multi_intent_prompt(emails, intents), MULTI_INTENT_RESPONSE_CONFIG
+                )
+                response_text = response.text
+            
+            classified = self._parse_multi_intent_response(response_text, email_index, intents)
+            self._cache_response(cache_key, response_text)
+        except Exception as e:
+            print(f"⚠️ Batched analysis failed ({e}), analyzing intents individually")
+            return await self._analyze_each_intent(emails, intents)
+        
+        results = {}
+        for intent, thread_ids in classified.items():
+            self._display_analysis_results(intent, thread_ids, email_index)
+            results[intent] = AnalysisResult(
+                intent=intent,
+                total_emails=len(emails),
+                classified_emails=len(thread_ids),
+                thread_ids=thread_ids,
+                success=True
+            )
+        return results
+    
+    async def _analyze_each_intent(self, emails: List, intents: List[str]) -> Dict[str, AnalysisResult]:
+        """Analyze intents concurrently, one request each, isolating per-intent failures."""
+        if emails and len(intents) > 1:
+            # Share one server-side copy of the email block across the intent calls
+            async with self.prepare_batch(emails) as cached_content:
+                outcomes = await asyncio.gather(
+                    *[self.analyze_emails_for_intent(emails, intent, cached_content) for intent in intents],
+                    return_exceptions=True
+                )
+        else:
+            outcomes = await asyncio.gather(
+                *[self.analyze_emails_for_intent(emails, intent) for intent in intents],
+                return_exceptions=True
+            )
+        
+        results = {}
+        for intent, outcome in zip(intents, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"❌ Error analyzing intent '{intent}': {outcome}")
+                outcome = AnalysisResult(
+                    intent=intent,
+                    total_emails=len(emails),
+                    classified_emails=0,
+                    thread_ids=[],
+                    success=False,
+                    error_message=str(outcome)
+                )
+            results[intent] = outcome
+        return results
+    
+    @staticmethod
+    def _index_emails(emails: List[AnalyzedEmail]) -> Dict[str, AnalyzedEmail]:
+        """Map thread IDs to their emails."""
+        return {email.thread_id: email for email in emails}
+    
+    def _format_email_block(self, emails: List[AnalyzedEmail]) -> str:
+        """Format emails into the prompt's email block, one line per email."""
+        return "\n".join([
+            f"Email {number}: Thread ID: {email.thread_id} | Subject: {email.subject} | "
+            f"From: {email.sender} | Date: {email.date} | Content: {email.content[:400]}..."
+            for number, email in enumerate(emails, 1)
+        ])
+    
+    def _create_universal_prompt(self, emails: Optional[List], intent: str) -> str:
+        """
+        Create a universal AI prompt that can handle ANY intent.
+        
+        Pass emails=None when the email block is supplied through cached content.
+        """
+        if emails is None:
+            email_section = "Use the EMAILS TO ANALYZE provided in the context above."
+        else:
+            email_section = f"EMAILS TO ANALYZE:\n{self._format_email_block(emails)}"
         
         # Create universal intent-agnostic prompt
         prompt = f"""
-You are an expert email analyst with deep understanding of email patterns, contexts, and user intents.
+You are an expert email analyst. Classify each email as matching the intent "{intent}" or not,
+judging by its meaning and purpose, sender, subject and content. Be precise: when uncertain, do NOT
+classify it, to avoid false positives.
 
-TASK: Analyze these emails and identify which ones match the specified intent.
-
-INTENT TO IDENTIFY: {intent}
-
-EMAILS TO ANALYZE:
-{chr(10).join(email_data)}
+{email_section}
 
-UNIVERSAL ANALYSIS FRAMEWORK:
-Use your comprehensive understanding to determine if each email relates to "{intent}". Consider:
-
-1. SEMANTIC UNDERSTANDING:
-   - Does the email's meaning and purpose align with "{intent}"?
-   - What is the core nature and intention of this email?
-
-2. CONTEXTUAL ANALYSIS:
-   - Who is the sender and what type of organization/person are they?
-   - What is the subject matter and tone of the email?
-   - What action or information is being communicated?
+Return the thread IDs of emails that clearly match "{intent}" as {{"thread_ids": [...]}}, with an empty list if none match.
+"""
+        return prompt
+    
+    def _create_multi_intent_prompt(self, emails: List, intents: List[str]) -> str:
+        """Create a single prompt that classifies the emails for several intents at once."""
+        email_block = self._format_email_block(emails)
+        intent_list = "\n".join(f"- {intent}" for intent in intents)
+        example = json.dumps({intent: ["thread_abc123"] for intent in intents[:2]})
+        
+        prompt = f"""
+You are an expert email analyst with deep understanding of email patterns, contexts, and user intents.
 
-3. CONTENT PATTERNS:
-   - Are there specific keywords, phrases, or patterns that relate to "{intent}"?
-   - Does the email structure or format suggest it belongs to this category?
+TASK: Analyze these emails and, for EACH intent below, identify which emails match it.
 
-4. SENDER CONTEXT:
-   - Does the sender type (domain, organization) align with "{intent}"?
-   - Is this from a source that would typically send "{intent}" related emails?
+EMAILS TO ANALYZE:
+{email_block}
 
-5. PURPOSE ALIGNMENT:
-   - What is the primary purpose of this email?
-   - Does this purpose match what "{intent}" emails typically aim to achieve?
+INTENTS:
+{intent_list}
 
 ANALYSIS GUIDELINES:
-- Think deeply about what "{intent}" means in the context of email communication
-- Consider both explicit and implicit indicators
-- Be precise - only classify emails that truly belong to this intent
-- Use your knowledge of email patterns, business communications, and user behaviors
-- When uncertain, err on the side of NOT classifying to avoid false positives
+- Judge each intent independently; an email may match several intents or none
+- Consider the meaning, sender, subject and content of each email
+- Be precise - when uncertain, err on the side of NOT classifying to avoid false positives
 
 REQUIRED OUTPUT FORMAT:
-Return ONLY the thread IDs of emails that clearly match "{intent}", one per line:
-thread_abc123
-thread_def456
-
-If NO emails match the intent, return:
-NO_MATCHES_FOUND
-
-Do not include explanations, reasoning, or additional text - just the thread IDs or "NO_MATCHES_FOUND".
+Return ONLY a JSON object mapping every intent (spelled exactly as listed) to the list of
+matching thread IDs, using an empty list when nothing matches, e.g. {example}
 """
         return prompt
     
-    def _parse_ai_response(self, ai_response: str, emails: List) -> List[str]:
-        """Parse AI response to extract valid thread IDs."""
-        classified_thread_ids = []
+    def _parse_multi_intent_response(self, ai_response: str, email_index: Dict[str, AnalyzedEmail],
+                                     intents: List[str]) -> Dict[str, List[str]]:
+        """
+        Parse the JSON intent map returned for a multi-intent prompt.
         
-        # Check for no matches
-        if "NO_MATCHES_FOUND" in ai_response.upper():
-            return []
+        Raises:
+            ValueError: If the response does not contain a usable JSON object
+        """
+        json_block = JSON_BLOCK_PATTERN.search(ai_response)
+        if json_block:
+            json_str = json_block.group(1)
+        else:
+            json_match = JSON_OBJECT_PATTERN.search(ai_response)
+            if not json_match:
+                raise ValueError("No JSON object found in multi-intent response")
+            json_str = json_match.group(0)
         
-        # Extract thread IDs
-        lines = ai_response.strip().split('\n')
-        # Get valid thread IDs from emails (handle both object and dict formats)
-        valid_thread_ids = set()
-        for email in emails:
-            if hasattr(email, 'thread_id'):
-                valid_thread_ids.add(email.thread_id)
-            elif isinstance(email, dict) and 'thread_id' in email:
-                valid_thread_ids.add(email['thread_id'])
-        
-        for line in lines:
-            line = line.strip()
-            # Check if line looks like a thread ID (either with 'thread_' prefix or raw thread ID)
-            if (line.startswith('thread_') or (line and len(line) > 10 and line.replace('_', '').replace('-', '').isalnum())) and line in valid_thread_ids:
-                classified_thread_ids.append(line)
-                print(f"    ✅ Found valid thread ID: {line}")
+        parsed = json_loads(json_str)
+        if not isinstance(parsed, dict):
+            raise ValueError("Multi-intent response is not a JSON object")
+        
+        # Match keys leniently in case the model normalizes case or spacing
+        by_key = {str(key).strip().upper(): value for key, value in parsed.items()}
+        
+        results = {}
+        for intent in intents:
+            thread_ids = by_key.get(intent.strip().upper()) or []
+            if not isinstance(thread_ids, list):
+                raise ValueError(f"Expected a list of thread IDs for intent '{intent}'")
+            results[intent] = [tid for tid in thread_ids if tid in email_index]
+        
+        return results
+    
+    def _parse_ai_response(self, ai_response: str, email_index: Dict[str, AnalyzedEmail]) -> List[str]:
+        """Decode the JSON-mode AI response and keep only valid thread IDs."""
+        thread_ids = json_loads(ai_response)["thread_ids"]
+        
+        classified_thread_ids = [thread_id for thread_id in thread_ids if thread_id in email_index]
+        logger.debug("    ✅ Found valid thread IDs: %s", classified_thread_ids)
         
         return classified_thread_ids
     
-    def _display_analysis_results(self, intent: str, classified_thread_ids: List[str], emails: List):
+    def _display_analysis_results(self, intent: str, classified_thread_ids: List[str],
+                                  email_index: Dict[str, AnalyzedEmail]):
         """Display analysis results in a user-friendly format."""
         if classified_thread_ids:
             print(f"✅ AI classified {len(classified_thread_ids)} emails as '{intent}':")
             for thread_id in classified_thread_ids:
-                # Find matching email (handle both object and dict formats)
-                email = None
-                for e in emails:
-                    if hasattr(e, 'thread_id') and e.thread_id == thread_id:
-                        email = e
-                        break
-                    elif isinstance(e, dict) and e.get('thread_id') == thread_id:
-                        email = e
-                        break
-                
+                email = email_index.get(thread_id)
                 if email:
-                    if hasattr(email, 'subject'):
-                        subject = email.subject[:50]
-                        sender = email.sender
-                    else:
-                        subject = email.get('subject', 'No subject')[:50]
-                        sender = email.get('sender', 'Unknown')
-                    print(f"   📧 {intent}: {subject}... (from: {sender})")
+                    print(f"   📧 {intent}: {email.subject[:50]}... (from: {email.sender})")
         else:
             print(f"📭 No emails classified as '{intent}'")
     
-    def _keyword_fallback(self, emails: List, intent: str) -> List[str]:
+    def _keyword_fallback(self, emails: List[AnalyzedEmail], intent: str) -> List[str]:
         """
         Fallback keyword-based classification when AI fails.
         Uses the intent words themselves as keywords.
         """
         print(f"🔄 Using keyword fallback for intent: {intent}")
         
-        # Extract keywords from the intent itself
-        intent_words = intent.lower().replace('_', ' ').split()
-        keywords = [word for word in intent_words if len(word) > 2]  # Filter short words
+        keywords, word_keywords, keyword_pattern = _compile_intent_keywords(intent)
         
         if not keywords:
             return []
         
         print(f"🔍 Fallback keywords: {keywords}")
         
+        threshold = max(1, len(keywords) // 2)
+        
         classified_thread_ids = []
         
         for email in emails:
-            # Handle both EmailSummary objects and dictionaries
-            if hasattr(email, 'subject'):
-                content = (email.subject + " " + email.sender + " " + (email.content_preview or "")).lower()
-                thread_id = email.thread_id
-                subject = email.subject
-            else:
-                content = (email.get('subject', '') + " " + email.get('sender', '') + " " + email.get('content_preview', '')).lower()
-                thread_id = email.get('thread_id', f'unknown_{id(email)}')
-                subject = email.get('subject', 'No subject')
+            content = " ".join((email.subject, email.sender, email.content)).lower()
+            
+            # One tokenization pass, then a C-level set intersection for word keywords
+            matches = len(word_keywords.intersection(WORD_PATTERN.findall(content)))
             
-            # Count keyword matches
-            matches = sum(1 for keyword in keywords if keyword in content)
+            # Remaining punctuated keywords, stopping as soon as the threshold is reached
+            if keyword_pattern is not None and matches < threshold:
+                matched_keywords = set()
+                for match in keyword_pattern.finditer(content):
+                    matched_keywords.add(match.group())
+                    if matches + len(matched_keywords) >= threshold:
+                        break
+                matches += len(matched_keywords)
             
             # Conservative threshold for fallback (at least half the keywords)
-            threshold = max(1, len(keywords) // 2)
             if matches >= threshold:
-                classified_thread_ids.append(thread_id)
-                print(f"📌 Keyword match for '{intent}': {subject} (matches: {matches})")
+                classified_thread_ids.append(email.thread_id)
+                print(f"📌 Keyword match for '{intent}': {email.subject} (matches: {matches})")
         
         return classified_thread_ids
 
@@ -329,14 +640,87 @@ def create_analyzer(gmail_client, gemini_api_key: Optional[str] = None) -> Unive
         gemini_api_key: Google AI API key (optional, will use environment variable)
         
     Returns:
-        Configured UniversalEmailAnalyzer instance
+        Configured UniversalEmailAnalyzer instance, shared across calls with
+        the same Gmail client and API key
     """
     api_key = gemini_api_key or os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY environment variable is required")
     
-    gemini_client = genai.Client(api_key=api_key)
-    return UniversalEmailAnalyzer(gemini_client, gmail_client)
+    return _cached_analyzer(gmail_client, api_key)
+
+
+def _gemini_http_options() -> Optional[Dict]:
+    """Build HTTP options that multiplex concurrent requests over pooled HTTP/2 connections."""
+    try:
+        import h2  # noqa: F401 - httpx needs the h2 package for HTTP/2
+        import httpx
+    except ImportError:
+        return None
+    
+    return {
+        "async_client_args": {
+            "http2": True,
+            "limits": httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        }
+    }
+
+
+# Event loop -> {API key: Gemini client}; an entry goes away with its loop
+_loop_gemini_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# API key -> Gemini client, for callers outside any event loop
+_sync_gemini_clients: Dict[str, genai.Client] = {}
+
+
+def get_shared_gemini_client(api_key: str) -> genai.Client:
+    """
+    Get the Gemini client for an API key, shared by every module on the running event loop.
+    
+    Reusing one client keeps its connection pool warm; with the h2 package
+    installed, concurrent async calls share HTTP/2 connections instead of
+    opening a TLS connection each. Async connections cannot outlive the loop
+    that opened them and every sync wrapper runs its own asyncio.run, so a
+    client is kept per loop; callers that own a loop close its clients with
+    aclose_shared_clients() before the loop ends.
+    """
+    try:
+        clients = _loop_gemini_clients.setdefault(asyncio.get_running_loop(), {})
+    except RuntimeError:
+        clients = _sync_gemini_clients
+    if api_key not in clients:
+        clients[api_key] = genai.Client(api_key=api_key, http_options=_gemini_http_options())
+    return clients[api_key]
+
+
+async def _aclose_loop_gemini_clients():
+    """Close the running event loop's Gemini connections and forget its shared clients."""
+    clients = _loop_gemini_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        close = getattr(client.aio, "aclose", None)
+        if close is not None:
+            await close()
+
+
+def _run_sync(coro):
+    """Run a coroutine in its own event loop, closing its Gemini connections before the loop ends."""
+    async def run():
+        try:
+            return await coro
+        finally:
+            await _aclose_loop_gemini_clients()
+    return asyncio.run(run())
+
+
+@lru_cache(maxsize=4)
+def _cached_analyzer(gmail_client, api_key: str) -> UniversalEmailAnalyzer:
+    """Get an analyzer per (Gmail client, API key) so its response cache is reused."""
+    return UniversalEmailAnalyzer(api_key, gmail_client)
+
+
+async def aclose_shared_clients():
+    """Close the shared Gemini connections and drop the cached analyzers built on them."""
+    await _aclose_loop_gemini_clients()
+    _cached_analyzer.cache_clear()
 
 
 def analyze_emails_for_intent(emails: List, intent: str, gmail_client, gemini_api_key: Optional[str] = None) -> List[str]:
@@ -360,30 +744,107 @@ def analyze_emails_for_intent(emails: List, intent: str, gmail_client, gemini_ap
         analyze_emails_for_intent(emails, "WORK MEETINGS", gmail_client)
         analyze_emails_for_intent(emails, "NEWSLETTER SUBSCRIPTIONS", gmail_client)
     """
-    # Clean up intent for label naming
-    clean_intent = intent.upper().strip()
-    label_name = clean_intent.replace(" ", "_").replace("-", "_")
+    return _run_sync(
+        analyze_emails_for_intent_async(emails, intent, gmail_client, gemini_api_key)
+    )
+
+
+async def analyze_emails_for_intent_async(emails: List, intent: str, gmail_client,
+                                          gemini_api_key: Optional[str] = None,
+                                          analyzer: Optional[UniversalEmailAnalyzer] = None,
+                                          auto_label: bool = True,
+                                          chunk_size: Optional[int] = None) -> List[str]:
+    """
+    Async variant of analyze_emails_for_intent that can be gathered across intents.
     
-    print(f"🎯 Analyzing for intent: '{intent}' (will label as: '{label_name}')")
+    Args:
+        emails: List of email objects
+        intent: ANY intent description (completely flexible)
+        gmail_client: Configured Gmail client instance
+        gemini_api_key: Google AI API key (optional)
+        analyzer: Existing analyzer to reuse (optional, created if None)
+        auto_label: Apply the intent label here; pass False to label separately
+        chunk_size: Split the emails into concurrent requests of this size (optional)
+        
+    Returns:
+        List of thread IDs that match the intent
+    """
+    print(f"🎯 Analyzing for intent: '{intent}' (will label as: '{label_name_for_intent(intent)}')")
     
     # Initialize analyzer
-    analyzer = create_analyzer(gmail_client, gemini_api_key)
+    if analyzer is None:
+        analyzer = create_analyzer(gmail_client, gemini_api_key)
     
     # Perform analysis
-    result = analyzer.analyze_emails_for_intent(emails, intent)
+    if chunk_size:
+        result = await analyzer.analyze_emails_in_chunks(emails, intent, chunk_size)
+    else:
+        result = await analyzer.analyze_emails_for_intent(emails, intent)
     
     # Auto-apply labels if emails were classified
-    if result.thread_ids:
-        print(f"🏷️ Auto-applying '{label_name}' labels to {len(result.thread_ids)} emails...")
-        try:
-            label_result = gmail_client.apply_label_to_emails(label_name, thread_ids=result.thread_ids)
-            print(f"📊 Labeling Result: {label_result.summary}")
-        except Exception as e:
-            print(f"⚠️ Labeling failed: {e}")
+    if auto_label:
+        apply_intent_label(gmail_client, intent, result.thread_ids)
     
     return result.thread_ids
 
 
+def analyze_emails_for_intents(emails: List, intents: List[str], gmail_client,
+                               gemini_api_key: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Analyze emails for several intents using a single batched Gemini request.
+    
+    Args:
+        emails: List of email objects
+        intents: Intent descriptions to classify against
+        gmail_client: Configured Gmail client instance
+        gemini_api_key: Google AI API key (optional)
+        
+    Returns:
+        Dictionary mapping each intent to the thread IDs that match it
+    """
+    return _run_sync(
+        analyze_emails_for_intents_async(emails, intents, gmail_client, gemini_api_key)
+    )
+
+
+async def analyze_emails_for_intents_async(emails: List, intents: List[str], gmail_client,
+                                           gemini_api_key: Optional[str] = None,
+                                           analyzer: Optional[UniversalEmailAnalyzer] = None) -> Dict[str, List[str]]:
+    """Async variant of analyze_emails_for_intents."""
+    print(f"🎯 Analyzing for intents: {', '.join(intents)}")
+    
+    if analyzer is None:
+        analyzer = create_analyzer(gmail_client, gemini_api_key)
+    
+    results = await analyzer.analyze_emails_for_intents(emails, intents)
+    
+    for intent, result in results.items():
+        apply_intent_label(gmail_client, intent, result.thread_ids)
+    
+    return {intent: result.thread_ids for intent, result in results.items()}
+
+
+def label_name_for_intent(intent: str) -> str:
+    """Convert an intent description into a Gmail label name."""
+    # Clean up intent for label naming
+    clean_intent = intent.upper().strip()
+    return clean_intent.replace(" ", "_").replace("-", "_")
+
+
+def apply_intent_label(gmail_client, intent: str, thread_ids: List[str]):
+    """Auto-apply the intent's label to classified threads, if any."""
+    if not thread_ids:
+        return
+    
+    label_name = label_name_for_intent(intent)
+    print(f"🏷️ Auto-applying '{label_name}' labels to {len(thread_ids)} emails...")
+    try:
+        label_result = gmail_client.apply_label_to_emails(label_name, thread_ids=thread_ids)
+        print(f"📊 Labeling Result: {label_result.summary}")
+    except Exception as e:
+        print(f"⚠️ Labeling failed: {e}")
+
+
 # ==================== TESTING UTILITIES ====================
 
 def test_universal_analysis(gmail_client, test_intents: Optional[List[str]] = None):
@@ -408,26 +869,25 @@ def test_universal_analysis(gmail_client, test_intents: Optional[List[str]] = No
         "SOCIAL MEDIA NOTIFICATIONS"
     ]
     
-    for intent in intents_to_test:
-        print(f"\n🔍 Testing intent: '{intent}'...")
+    try:
+        # Get recent emails for testing
+        recent_emails = gmail_client.read_emails_by_time_period(days_ago=3, count=5)
         
-        try:
-            # Get recent emails for testing
-            recent_emails = gmail_client.read_emails_by_time_period(days_ago=3, count=5)
+        if not recent_emails:
+            print("📭 No recent emails found for testing")
+            return
+        
+        # Classify all intents in one batched request
+        results = analyze_emails_for_intents(recent_emails, intents_to_test, gmail_client)
+        
+        for intent, result_thread_ids in results.items():
+            print(f"📊 Results for '{intent}':")
+            print(f"   📧 Total emails analyzed: {len(recent_emails)}")
+            print(f"   🎯 Emails matching intent: {len(result_thread_ids)}")
+            print()
             
-            if recent_emails:
-                # Analyze for current intent
-                result_thread_ids = analyze_emails_for_intent(recent_emails, intent, gmail_client)
-                
-                print(f"📊 Results for '{intent}':")
-                print(f"   📧 Total emails analyzed: {len(recent_emails)}")
-                print(f"   🎯 Emails matching intent: {len(result_thread_ids)}")
-                print()
-            else:
-                print(f"📭 No recent emails found for testing '{intent}'")
-                
-        except Exception as e:
-            print(f"❌ Error testing '{intent}': {e}")
+    except Exception as e:
+        print(f"❌ Error testing intents: {e}")
     
     print("✅ Universal intent analysis testing completed!")
 
@@ -470,6 +930,7 @@ def get_example_intents() -> List[str]:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
     print("🌟 Universal Email Intent Analyzer")
     print("This system can analyze emails for ANY intent you specify!")
     print("\nExample intents:")
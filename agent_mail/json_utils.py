@@ -0,0 +1,21 @@
+"""
+JSON Helpers
+
+This module provides the JSON decoder shared by the email orchestration
+workflow and the intent analyzer. It uses orjson when it is installed, which
+decodes several times faster, and the standard library otherwise. orjson's
+decode errors subclass json.JSONDecodeError, so callers keep catching the
+stdlib exception type.
+
+Author: AI Assistant
+Date: September 2025
+"""
+
+import json
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    json_loads = json.loads
+
+__all__ = ["json_loads"]
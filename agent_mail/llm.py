@@ -10,30 +10,205 @@ Date: September 2025
 """
 
 import os
-import re
 import json
-import gc
-import atexit
+import asyncio
+import logging
+from functools import lru_cache
 from typing import List, Dict, Optional
 from datetime import datetime
 
 from google import genai
+from google.genai import errors as genai_errors
 from dotenv import load_dotenv
-from main import create_gmail_client
-from email_analyzer import analyze_emails_for_intent
+from main import create_gmail_client, OperationResult
+from email_analyzer import (
+    analyze_emails_for_intent_async, apply_intent_label,
+    get_shared_gemini_client, aclose_shared_clients,
+)
+from llm_cache import ResponseCache
+from json_utils import json_loads
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-# ==================== GLOBAL CONFIGURATION ====================
 
-# Load API key and initialize clients
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY environment variable is required")
+# ==================== SHARED CLIENTS ====================
 
-client = genai.Client(api_key=api_key)
-gmail_client = create_gmail_client()
+def get_gemini_client() -> genai.Client:
+    """Get the Gemini client shared on the running event loop, creating it on first use."""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is required")
+    return get_shared_gemini_client(api_key)
+
+
+@lru_cache(maxsize=1)
+def get_gmail_client():
+    """Get the shared Gmail client, creating it on first use."""
+    return create_gmail_client()
+
+
+# Concurrency limits shared by all workflows running on the event loop
+MAX_CONCURRENT_GEMINI_REQUESTS = 8
+GEMINI_MAX_RETRIES = 3
+GEMINI_RETRYABLE_CODES = {429, 503}
+
+_loop_primitives = {}
+
+LLM_DISK_CACHE_DIR = "~/.cache/agent_mail/llm"
+
+# Planning responses for repeated prompts. Every entry expires: first-step plans
+# carry date-relative parameters (days_ago) although the timestamp is not part
+# of the key, and later steps depend on mailbox state.
+response_cache = ResponseCache(
+    # Off by default: a semantic hit reuses the whole cached plan, so a paraphrase
+    # asking for a different period or count would get the earlier parameters
+    semantic=os.getenv("AGENT_MAIL_SEMANTIC_CACHE") == "1",
+    # Persist responses across runs for development and replay only
+    disk_path=LLM_DISK_CACHE_DIR if os.getenv("AGENT_MAIL_LLM_CACHE") == "1" else None,
+)
+PLAN_RESPONSE_TTL = 3600
+STATEFUL_RESPONSE_TTL = 300
+
+# Emails per concurrent Gemini request during intent analysis
+ANALYSIS_CHUNK_SIZE = 10
+
+
+def _get_loop_primitives():
+    """Get the (Gemini semaphore, Gmail lock) pair bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _loop_primitives:
+        _loop_primitives.clear()
+        _loop_primitives[loop] = (asyncio.Semaphore(MAX_CONCURRENT_GEMINI_REQUESTS), asyncio.Lock())
+    return _loop_primitives[loop]
+
+
+async def _call_gemini_with_retries(request):
+    """Run a Gemini request under the semaphore, retrying rate-limit and overload errors with backoff."""
+    semaphore, _ = _get_loop_primitives()
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                return await request()
+        except genai_errors.APIError as e:
+            if e.code not in GEMINI_RETRYABLE_CODES or attempt == GEMINI_MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            print(f"⏳ Gemini returned {e.code}, retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+
+async def _read_stream_until_json(contents) -> str:
+    """Stream a Gemini response, stopping as soon as the JSON object is complete."""
+    scanner = JsonObjectScanner()
+    stream = await get_gemini_client().aio.models.generate_content_stream(
+        model="gemini-2.0-flash",
+        contents=contents,
+    )
+    try:
+        async for chunk in stream:
+            if chunk.text and scanner.feed(chunk.text) is not None:
+                break
+    finally:
+        # Closing the stream cancels the rest of the generation
+        await stream.aclose()
+    return scanner.buffer
+
+
+async def stream_plan_text_async(contents) -> str:
+    """
+    Get a planning response from Gemini as text, streamed.
+    
+    The planner replies with a single JSON object, so reading stops at its
+    closing brace instead of waiting for any trailing text.
+    
+    Returns:
+        Response text up to and including the JSON object
+    """
+    return await _call_gemini_with_retries(lambda: _read_stream_until_json(contents))
+
+
+async def run_gmail_call(func, *args, **kwargs):
+    """
+    Run a blocking Gmail client call in a worker thread.
+    
+    The Gmail service object is not thread-safe, so calls are serialized
+    with a lock while still keeping the event loop free.
+    """
+    _, gmail_lock = _get_loop_primitives()
+    async with gmail_lock:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+class LabelBatcher:
+    """
+    Buffers apply_label_to_emails calls within a workflow.
+    
+    Consecutive label steps are merged per label and sent as a single Gmail
+    call when the workflow moves on to a different function or finishes,
+    instead of one round-trip per planned step.
+    """
+    
+    def __init__(self):
+        """Initialize an empty buffer of label -> (email_ids, thread_ids)."""
+        self._pending: Dict[str, tuple] = {}
+    
+    def add(self, label_name: str, email_ids: Optional[List[str]] = None,
+            thread_ids: Optional[List[str]] = None) -> OperationResult:
+        """
+        Queue a label application.
+        
+        Args:
+            label_name: Name of the label to apply
+            email_ids: List of individual email IDs to label
+            thread_ids: List of thread IDs to label
+            
+        Returns:
+            OperationResult describing the queued items; nothing is applied
+            until flush() runs
+        """
+        pending_emails, pending_threads = self._pending.setdefault(label_name, ({}, {}))
+        # dicts keep insertion order while dropping duplicate ids
+        pending_emails.update(dict.fromkeys(email_ids or []))
+        pending_threads.update(dict.fromkeys(thread_ids or []))
+        queued = len(email_ids or []) + len(thread_ids or [])
+        return OperationResult(
+            success=True,
+            message=f"Queued label '{label_name}' for {queued} items (pending)",
+            processed_items=list(email_ids or []) + [f"thread_{tid}" for tid in thread_ids or []],
+            errors=[]
+        )
+    
+    async def flush(self) -> Dict[str, OperationResult]:
+        """
+        Apply every queued label with one Gmail call per label.
+        
+        A failing call is reported in its label's result so the remaining
+        labels are still applied.
+        
+        Returns:
+            Dictionary mapping each applied label name to its OperationResult
+        """
+        pending, self._pending = self._pending, {}
+        results = {}
+        for label_name, (email_ids, thread_ids) in pending.items():
+            if not email_ids and not thread_ids:
+                continue
+            print(f"🏷️ Applying batched label '{label_name}' to {len(email_ids) + len(thread_ids)} items")
+            try:
+                results[label_name] = await run_gmail_call(
+                    get_gmail_client().apply_label_to_emails, label_name,
+                    email_ids=list(email_ids) or None, thread_ids=list(thread_ids) or None
+                )
+            except Exception as e:
+                results[label_name] = OperationResult(
+                    success=False,
+                    message=f"Failed to apply label '{label_name}': {e}",
+                    processed_items=[],
+                    errors=[str(e)]
+                )
+        return results
 
 
 # ==================== UTILITY FUNCTIONS ====================
@@ -48,25 +223,85 @@ def convert_given_time_into_days_ago(given_time):
     return (datetime.now() - given_time).days
 
 
+class JsonObjectScanner:
+    """
+    Incrementally locates the first complete JSON object in streamed LLM text.
+    
+    Starts at the first '{' after an optional ```json fence and tracks brace
+    depth, ignoring braces inside string literals, to find its matching '}'.
+    Each character is scanned once no matter how the text is split.
+    """
+    
+    def __init__(self):
+        """Initialize an empty scanner."""
+        self.buffer = ""
+        self._start = -1
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, text: str) -> Optional[str]:
+        """
+        Append text and continue scanning.
+        
+        Args:
+            text: Next piece of the response
+            
+        Returns:
+            The JSON object text once it is complete, otherwise None
+        """
+        self.buffer += text
+        buffer = self.buffer
+        if self._start == -1:
+            fence = buffer.find("```json")
+            self._start = buffer.find("{", fence + 7 if fence != -1 else 0)
+            if self._start == -1:
+                return None
+            self._position = self._start
+        
+        for index in range(self._position, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._position = index + 1
+                    return buffer[self._start:index + 1]
+        
+        self._position = len(buffer)
+        return None
+
+
+def extract_json_object(response: str) -> Optional[str]:
+    """
+    Locate the first complete JSON object in an LLM response in a single pass.
+    
+    Returns:
+        The JSON object text, or None if no complete object is present
+    """
+    return JsonObjectScanner().feed(response)
+
+
 def parse_llm_response(response):
     """Parse LLM response to extract JSON object with robust error handling."""
-    try:
-        # Try to extract JSON from markdown code block
-        json_object = re.search(r"```json\n(.*?)\n```", response, re.DOTALL)
-        if json_object:
-            json_str = json_object.group(1)
-            parsed_response = json.loads(json_str)
-            return parsed_response
-            
-        # Fallback: Try to find JSON object directly
-        json_match = re.search(r'\{.*?\}', response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            parsed_response = json.loads(json_str)
-            return parsed_response
-            
+    json_str = extract_json_object(response)
+    if json_str is None:
         print("❌ No valid JSON found in response")
         return None
+    
+    try:
+        return json_loads(json_str)
         
     except json.JSONDecodeError as e:
         print(f"❌ JSON parsing error: {e}")
@@ -74,15 +309,13 @@ def parse_llm_response(response):
         
         # Try to fix common JSON issues
         try:
-            if json_object:
-                json_str = json_object.group(1)
-                # Fix common escape issues
-                json_str = json_str.replace('\\', '\\\\')  # Escape backslashes
-                json_str = json_str.replace('\n', '\\n')   # Escape newlines
-                json_str = json_str.replace('\t', '\\t')   # Escape tabs
-                parsed_response = json.loads(json_str)
-                print("✅ Fixed JSON parsing with escape handling")
-                return parsed_response
+            # Fix common escape issues
+            json_str = json_str.replace('\\', '\\\\')  # Escape backslashes
+            json_str = json_str.replace('\n', '\\n')   # Escape newlines
+            json_str = json_str.replace('\t', '\\t')   # Escape tabs
+            parsed_response = json_loads(json_str)
+            print("✅ Fixed JSON parsing with escape handling")
+            return parsed_response
         except:
             pass
             
@@ -94,18 +327,8 @@ def parse_llm_response(response):
 
 # ==================== ORCHESTRATION PROMPT SYSTEM ====================
 
-def create_prompt(previous_results=None, next_steps=None):
-    """
-    Create the main orchestration prompt for multi-step email workflows.
-    
-    Args:
-        previous_results: Results from previous step execution
-        next_steps: Next steps to be executed
-        
-    Returns:
-        Formatted prompt string for Gemini AI
-    """
-    base_prompt = """
+# Built once at import; create_prompt only appends the per-step context
+BASE_PROMPT = """
 You are an AI assistant that can solve tasks by calling specific tools in a multi-step workflow.
 You must ONLY respond with a single JSON object in the format:
 
@@ -176,32 +399,140 @@ CRITICAL JSON FORMATTING RULES:
 - Labels are automatically created and applied based on the intent name (spaces become underscores)
 - The system dynamically adapts to new intents without requiring predefined configurations
 """
-    
-    if previous_results is not None:
-        context = f"""
 
-### Previous Step Results:
-{str(previous_results)}...
+CONTEXT_TEMPLATE = """
+
+### Previous Step Results (summary; full data is kept by the system and used automatically):
+{previous_results}
 
 ### Next Steps to Execute:
 {next_steps}
 
 Based on the previous results and next steps, determine what action to take next to complete the user's request.
 """
-        base_prompt += context
+
+
+def summarize_step_result(result, step_number: int, sample_size: int = 3):
+    """
+    Condense a step's result into a small summary for the next planning prompt.
+    
+    Full results (e.g. fetched emails) stay in the workflow's data store, so the
+    prompt only needs their shape, not every email body.
+    
+    Args:
+        result: Result returned by execute_llm_response
+        step_number: Step that produced the result
+        sample_size: Number of sample items to include
+        
+    Returns:
+        Summary dictionary, or None if the step produced no result
+    """
+    if result is None:
+        return None
+    
+    summary = {"step": step_number, "type": type(result).__name__}
+    if isinstance(result, list):
+        summary["count"] = len(result)
+        if result and hasattr(result[0], 'subject'):
+            summary["emails_ref"] = "emails"
+            summary["sample_subjects"] = [email.subject[:80] for email in result[:sample_size]]
+        else:
+            summary["sample"] = [str(item)[:80] for item in result[:sample_size]]
+    elif hasattr(result, 'message'):
+        # OperationResult
+        summary["message"] = result.message
+        summary["summary"] = result.summary
+    else:
+        summary["value"] = str(result)[:200]
+    return summary
+
+
+def create_prompt(previous_results=None, next_steps=None):
+    """
+    Create the main orchestration prompt for multi-step email workflows.
+    
+    Args:
+        previous_results: Summary of the previous step's results (see summarize_step_result)
+        next_steps: Next steps to be executed
+        
+    Returns:
+        Formatted prompt string for Gemini AI
+    """
+    if previous_results is None:
+        return BASE_PROMPT
     
-    return base_prompt
+    return BASE_PROMPT + CONTEXT_TEMPLATE.format(previous_results=previous_results, next_steps=next_steps)
 
 
 # ==================== WORKFLOW EXECUTION ENGINE ====================
 
-def execute_llm_response(parsed_response, email_data_store):
+async def _handle_read(parameters, email_data_store):
+    """Read emails for a time period and store them for later steps."""
+    result = await run_gmail_call(get_gmail_client().read_emails_by_time_period, **parameters)
+    # Store emails in data store for later use
+    email_data_store['emails'] = result
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔍 Email Storage Debug:")
+        logger.debug(f"  - Storing {len(result) if result else 0} emails in data store")
+        if result:
+            logger.debug(f"  - Sample stored email subjects: {[e.subject[:50] for e in result[:3]]}")
+    
+    return result
+
+
+async def _handle_label(parameters, email_data_store):
+    """Apply a label to the given emails or threads."""
+    return await run_gmail_call(get_gmail_client().apply_label_to_emails, **parameters)
+
+
+async def _handle_analyze(parameters, email_data_store):
+    """Classify the stored emails for an intent and label the matches."""
+    # Use the stored emails for intent analysis
+    emails = email_data_store.get('emails', [])
+    intent = parameters.get("intent", "SPAM")
+    
+    if not emails:
+        print("❌ No emails found in data store!")
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔍 Email Data Store Debug:")
+        logger.debug(f"  - Data store keys: {list(email_data_store.keys())}")
+        logger.debug(f"  - Number of emails retrieved: {len(emails)}")
+        logger.debug(f"  - Sample email subjects: {[e.subject[:50] for e in emails[:3]]}")
+    
+    gmail_client = get_gmail_client()
+    result = await analyze_emails_for_intent_async(
+        emails, intent, gmail_client, auto_label=False, chunk_size=ANALYSIS_CHUNK_SIZE
+    )
+    await run_gmail_call(apply_intent_label, gmail_client, intent, result)
+    # Store classified thread IDs for later use
+    email_data_store[f'{intent.lower()}_thread_ids'] = result
+    return result
+
+
+async def _handle_none(parameters, email_data_store):
+    """No-op step."""
+    return None
+
+
+# Planner function name -> async handler(parameters, email_data_store)
+_HANDLERS = {
+    "read_emails_by_time_period": _handle_read,
+    "apply_label_to_emails": _handle_label,
+    "analyze_emails_for_intent": _handle_analyze,
+    "none": _handle_none,
+}
+
+
+async def execute_llm_response(parsed_response, email_data_store, label_batcher=None):
     """
     Execute the function specified in the LLM response.
     
     Args:
         parsed_response: Parsed JSON response from LLM
         email_data_store: Dictionary to store data between workflow steps
+        label_batcher: LabelBatcher to queue label steps into (optional); the
+            caller flushes it before other steps run
         
     Returns:
         Result of the executed function
@@ -209,54 +540,33 @@ def execute_llm_response(parsed_response, email_data_store):
     function_name = parsed_response.get("function_name")
     parameters = parsed_response.get("parameters", {})
     
-    if function_name == "read_emails_by_time_period":
-        result = gmail_client.read_emails_by_time_period(**parameters)
-        # Store emails in data store for later use
-        email_data_store['emails'] = result
-        
-        # Debug: Confirm storage
-        print(f"🔍 Email Storage Debug:")
-        print(f"  - Storing {len(result) if result else 0} emails in data store")
-        if result:
-            print(f"  - Sample stored email subjects: {[e.subject[:50] for e in result[:3]]}")
-        print()
-        
-        return result
-    
-    elif function_name == "apply_label_to_emails":
-        return gmail_client.apply_label_to_emails(**parameters)
+    if label_batcher is not None and function_name == "apply_label_to_emails":
+        return label_batcher.add(**parameters)
     
-    elif function_name == "analyze_emails_for_intent":
-        # Use the stored emails for intent analysis
-        emails = email_data_store.get('emails', [])
-        intent = parameters.get("intent", "SPAM")
-        
-        # Debug: Check what emails we have
-        print(f"🔍 Email Data Store Debug:")
-        print(f"  - Data store keys: {list(email_data_store.keys())}")
-        print(f"  - Number of emails retrieved: {len(emails)}")
-        if emails:
-            print(f"  - Sample email subjects: {[e.subject[:50] for e in emails[:3]]}")
-        else:
-            print(f"  - ❌ No emails found in data store!")
-        print()
-        
-        result = analyze_emails_for_intent(emails, intent, gmail_client, api_key)
-        # Store classified thread IDs for later use
-        email_data_store[f'{intent.lower()}_thread_ids'] = result
-        return result
-    
-    elif function_name == "none":
-        return None
-    
-    else:
+    handler = _HANDLERS.get(function_name)
+    if handler is None:
         print(f"❌ Unknown function: {function_name}")
         return None
+    return await handler(parameters, email_data_store)
 
 
 # ==================== MAIN ORCHESTRATION WORKFLOW ====================
 
-def run_email_workflow(user_message: str, max_attempts: int = 5):
+async def _flush_labels(label_batcher: LabelBatcher, step_number: int, workflow_results: List[Dict]):
+    """Apply the queued labels and record each Gmail result in the workflow results."""
+    for label_name, result in (await label_batcher.flush()).items():
+        workflow_results.append({
+            "step": step_number,
+            "function": "apply_label_to_emails",
+            "parameters": {"label_name": label_name},
+            "result": result,
+            "success": result.success,
+            "status": "completed" if result.success else "failed",
+            "batched": True
+        })
+
+
+async def run_email_workflow(user_message: str, max_attempts: int = 5):
     """
     Run the main email orchestration workflow.
     
@@ -276,6 +586,7 @@ def run_email_workflow(user_message: str, max_attempts: int = 5):
     step_number = 1
     email_data_store = {}  # Store email data between steps
     workflow_results = []
+    label_batcher = LabelBatcher()
     
     try:
         for attempt in range(max_attempts):
@@ -297,39 +608,53 @@ def run_email_workflow(user_message: str, max_attempts: int = 5):
             
             contents = [{"parts": [{"text": prompt_text}]}]
             
-            print(f"🤖 Sending request to Gemini AI...")
+            # Only the first step is a pure function of the user request
+            semantic_key = user_message if previous_results is None else None
+            response_text = response_cache.lookup(prompt_text, semantic_key)
+            cache_hit = response_text is not None
             
-            # Call Gemini API
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=contents,
-            )
+            if not cache_hit:
+                print(f"🤖 Sending request to Gemini AI...")
+                
+                # Call Gemini API, streaming until the JSON plan is complete
+                response_text = await stream_plan_text_async(contents)
+            else:
+                print(f"♻️ Reusing cached plan for this step")
             
             # Parse LLM response
-            parsed_response = parse_llm_response(response.text)
+            parsed_response = parse_llm_response(response_text)
             print(f"📥 Parsed Response: {parsed_response}")
             
             if not parsed_response:
                 print("❌ Failed to parse LLM response")
                 break
             
+            if not cache_hit:
+                cache_ttl = PLAN_RESPONSE_TTL if previous_results is None else STATEFUL_RESPONSE_TTL
+                response_cache.put(prompt_text, response_text, semantic_key, ttl=cache_ttl)
+            
             # Execute the function
             function_name = parsed_response.get('function_name', 'unknown')
+            queued = function_name == "apply_label_to_emails"
+            if not queued:
+                # Queued labels must land before any step that reads or relabels mail
+                await _flush_labels(label_batcher, step_number, workflow_results)
             print(f"⚡ Executing: {function_name}")
-            execution_result = execute_llm_response(parsed_response, email_data_store)
+            execution_result = await execute_llm_response(parsed_response, email_data_store, label_batcher)
             
-            # Store step results
+            # Store step results; queued label steps only succeed once flushed
             step_result = {
                 "step": step_number,
                 "function": function_name,
                 "parameters": parsed_response.get("parameters", {}),
                 "result": execution_result,
-                "success": execution_result is not None
+                "success": None if queued else execution_result is not None,
+                "status": "pending" if queued else ("completed" if execution_result is not None else "failed")
             }
             workflow_results.append(step_result)
             
             # Update state for next iteration
-            previous_results = execution_result
+            previous_results = summarize_step_result(execution_result, step_number)
             next_steps = parsed_response.get("next_steps", "")
             workflow_complete = parsed_response.get("workflow_complete", False)
             step_number += 1
@@ -343,9 +668,11 @@ def run_email_workflow(user_message: str, max_attempts: int = 5):
             print(f"➡️ Next steps: {next_steps}")
             print("-" * 60)
         
+        await _flush_labels(label_batcher, step_number, workflow_results)
+        
         return {
             "success": workflow_complete,
-            "steps_executed": len(workflow_results),
+            "steps_executed": step_number - 1,
             "results": workflow_results,
             "email_data": email_data_store,
             "message": "Workflow completed successfully" if workflow_complete else "Workflow incomplete"
@@ -355,38 +682,79 @@ def run_email_workflow(user_message: str, max_attempts: int = 5):
         print(f"❌ Workflow failed: {e}")
         return {
             "success": False,
-            "steps_executed": len(workflow_results),
+            "steps_executed": step_number - 1,
             "results": workflow_results,
             "email_data": email_data_store,
             "error": str(e),
             "message": f"Workflow failed: {e}"
         }
+    finally:
+        # Labels queued by earlier steps are applied even if a later step fails
+        try:
+            await _flush_labels(label_batcher, step_number, workflow_results)
+        except Exception as e:
+            print(f"❌ Applying queued labels failed: {e}")
+            workflow_results.append({
+                "step": step_number,
+                "function": "apply_label_to_emails",
+                "parameters": {},
+                "result": None,
+                "success": False,
+                "status": "failed",
+                "batched": True,
+                "error": str(e)
+            })
+
+
+async def run_many(messages: List[str], max_attempts: int = 5) -> List[Dict]:
+    """
+    Run several independent email workflows concurrently.
+    
+    Args:
+        messages: User requests to process
+        max_attempts: Maximum number of workflow steps per request
+        
+    Returns:
+        List of workflow result dictionaries, in the same order as messages
+    """
+    return await asyncio.gather(*[run_email_workflow(message, max_attempts) for message in messages])
 
 
 # ==================== RESOURCE CLEANUP ====================
 
 def cleanup_resources():
-    """Clean up resources properly."""
-    global client, gmail_client
-    try:
-        client = None
-        gmail_client = None
-        gc.collect()
-    except:
-        pass
+    """Release the cached Gmail client so it is recreated on next use."""
+    get_gmail_client.cache_clear()
 
-# Register cleanup function
-atexit.register(cleanup_resources)
+
+async def aclose():
+    """
+    Close the Gemini connections and release the cached clients and analyzers.
+    
+    Nothing runs at interpreter exit; long-running servers call this from
+    their own shutdown path.
+    """
+    await aclose_shared_clients()
+    cleanup_resources()
 
 
 # ==================== MAIN EXECUTION ====================
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    
     # Example workflow execution
     user_message = "Read the top 10 emails from 3 days and analyze them for ECOMMERCE AMAZON intent, then automatically label them"
     
+    async def run_and_close(message):
+        """Run one workflow, then close its Gemini connections before the loop ends."""
+        try:
+            return await run_email_workflow(message)
+        finally:
+            await aclose()
+    
     try:
-        result = run_email_workflow(user_message)
+        result = asyncio.run(run_and_close(user_message))
         
         print("\n" + "=" * 80)
         print("📊 WORKFLOW SUMMARY")
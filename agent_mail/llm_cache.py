@@ -0,0 +1,184 @@
+"""
+LLM Response Cache
+
+This module provides a two-tier cache for Gemini responses used by the email
+orchestration workflow. The exact tier returns a stored response when the same
+prompt is seen again; the optional semantic tier returns a stored response when
+a new request is phrased differently but means the same thing. An optional
+on-disk tier keeps responses across runs for development and replay.
+
+Author: AI Assistant
+Date: September 2025
+"""
+
+import os
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional, List, Tuple
+
+# Every workflow prompt starts with the current timestamp, which would otherwise
+# make identical requests look different to the cache
+TIMESTAMP_LINE_PATTERN = re.compile(r"^You took the current date and time as [^\n]*\n")
+
+
+def normalize_prompt(prompt_text: str) -> str:
+    """Strip volatile parts of a workflow prompt before it is used as a cache key."""
+    return TIMESTAMP_LINE_PATTERN.sub("", prompt_text, count=1).strip()
+
+
+def hash_prompt(prompt_text: str) -> str:
+    """Hash a normalized prompt into a compact cache key."""
+    return hashlib.blake2b(normalize_prompt(prompt_text).encode(), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM response texts.
+    
+    The exact tier is an LRU keyed by the hash of the normalized prompt. The
+    semantic tier (opt-in, requires sentence-transformers) embeds a short
+    semantic key such as the user request and matches new keys by cosine
+    similarity, so paraphrased requests reuse an earlier response verbatim,
+    parameters included; only enable it where that is acceptable. The disk
+    tier (opt-in, requires diskcache) sits under the exact tier with the same keys.
+    """
+    
+    def __init__(self, maxsize: int = 10_000, semantic: bool = False,
+                 similarity_threshold: float = 0.85,
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 disk_path: Optional[str] = None, disk_expire: float = 86400):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of exact-tier entries kept (LRU eviction)
+            semantic: Enable the embedding-based similarity tier
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embedding_model: Sentence-transformers model used for embeddings
+            disk_path: Directory for the on-disk tier; None keeps the cache in memory only
+            disk_expire: Seconds an on-disk entry without its own TTL is kept
+        """
+        self.maxsize = maxsize
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._semantic_keys: List[str] = []
+        self._embeddings = None
+        self._encoder = None
+        self.semantic = semantic and self._load_encoder()
+        self.disk_expire = disk_expire
+        self._disk = self._open_disk(disk_path) if disk_path else None
+    
+    def _load_encoder(self) -> bool:
+        """Load the sentence embedding model, disabling the semantic tier if unavailable."""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            print("⚠️ sentence-transformers not installed, semantic cache disabled")
+            return False
+        self._encoder = SentenceTransformer(self.embedding_model)
+        return True
+    
+    def _open_disk(self, disk_path: str):
+        """Open the on-disk tier, disabling it if diskcache is unavailable."""
+        try:
+            from diskcache import Cache
+        except ImportError:
+            print("⚠️ diskcache not installed, on-disk cache disabled")
+            return None
+        return Cache(os.path.expanduser(disk_path))
+    
+    def _embed(self, text: str):
+        """Embed text as a unit-length vector so dot products are cosine similarities."""
+        return self._encoder.encode([text], normalize_embeddings=True)[0]
+    
+    def _get_entry(self, key: str) -> Optional[str]:
+        """Return a live exact-tier response, dropping it if it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response_text, expires_at = entry
+        if expires_at is not None and time.monotonic() > expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response_text
+    
+    def _get_disk_entry(self, key: str) -> Optional[str]:
+        """Return an on-disk response, promoting it into the exact tier."""
+        if self._disk is None:
+            return None
+        response_text, expire_time = self._disk.get(key, expire_time=True)
+        if response_text is not None:
+            self._store(key, response_text, None if expire_time is None else expire_time - time.time())
+        return response_text
+    
+    def _store(self, key: str, response_text: str, ttl: Optional[float]):
+        """Insert an exact-tier entry, evicting the least recently used one if full."""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (response_text, expires_at)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def lookup(self, prompt_text: str, semantic_key: Optional[str] = None) -> Optional[str]:
+        """
+        Look up a cached response for a prompt.
+        
+        Args:
+            prompt_text: Full prompt sent to the LLM
+            semantic_key: Short text to match by meaning (only used if the semantic tier is on)
+        
+        Returns:
+            Cached response text, or None on a miss
+        """
+        key = hash_prompt(prompt_text)
+        response_text = self._get_entry(key)
+        if response_text is None:
+            response_text = self._get_disk_entry(key)
+        if response_text is not None or not (self.semantic and semantic_key and self._semantic_keys):
+            return response_text
+        
+        similarities = self._embeddings @ self._embed(semantic_key)
+        best = int(similarities.argmax())
+        if similarities[best] < self.similarity_threshold:
+            return None
+        return self._get_entry(self._semantic_keys[best])
+    
+    def put(self, prompt_text: str, response_text: str, semantic_key: Optional[str] = None,
+            ttl: Optional[float] = None):
+        """
+        Store a response for a prompt.
+        
+        Args:
+            prompt_text: Full prompt sent to the LLM
+            response_text: Raw response text to cache
+            semantic_key: Short text to index in the semantic tier (optional)
+            ttl: Seconds until the entry expires; None keeps it until evicted
+        """
+        key = hash_prompt(prompt_text)
+        self._store(key, response_text, ttl)
+        if self._disk is not None:
+            self._disk.set(key, response_text, expire=ttl if ttl is not None else self.disk_expire)
+        
+        if self.semantic and semantic_key:
+            import numpy as np
+            
+            embedding = self._embed(semantic_key)
+            self._embeddings = (embedding[None, :] if self._embeddings is None
+                                else np.vstack([self._embeddings, embedding]))
+            self._semantic_keys.append(key)
+            # Keep the semantic index no larger than the exact tier it points into
+            if len(self._semantic_keys) > self.maxsize:
+                self._semantic_keys = self._semantic_keys[1:]
+                self._embeddings = self._embeddings[1:]
+    
+    def clear(self):
+        """Remove all cached entries."""
+        self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+        self._semantic_keys = []
+        self._embeddings = None
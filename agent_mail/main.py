@@ -9,19 +9,32 @@ Date: September 2025
 """
 
 import os.path
-import base64
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Union, Any
+import sys
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from typing import List, Dict, Optional, Union, Any, Tuple, Iterator
 from dataclasses import dataclass
 
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+try:
+    # pybase64's SIMD decoder is several times faster on large bodies
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class EmailSummary:
     """Data class for email summary information."""
     subject: str
@@ -33,7 +46,7 @@ class EmailSummary:
     content_preview: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class OperationResult:
     """Data class for operation results."""
     success: bool
@@ -119,13 +132,40 @@ class GmailAuthenticator:
 class EmailContentExtractor:
     """Utility class for extracting content from Gmail message payloads."""
     
+    # Headers copied into the summary; the first occurrence of each wins
+    WANTED_HEADERS = frozenset({'subject', 'from', 'to', 'date'})
+    
     @staticmethod
-    def extract_message_body(payload: Dict[str, Any]) -> str:
+    def decode_body_data(data: str, max_chars: Optional[int] = None) -> str:
+        """
+        Decode a Gmail base64url body into text.
+        
+        Args:
+            data: Base64url-encoded body data
+            max_chars: Only decode enough data for this many characters (plus one,
+                so callers can tell the text was longer)
+            
+        Returns:
+            Decoded text
+        """
+        errors = 'strict'
+        if max_chars is not None:
+            # UTF-8 needs at most 4 bytes per character; base64 encodes 3 bytes as 4 chars
+            limit = ((max_chars + 1) * 4 + 2) // 3 * 4
+            if len(data) > limit:
+                data = data[:limit]
+                # The cut may split a multi-byte character
+                errors = 'ignore'
+        return b64decode(data.encode("ascii"), altchars=b"-_").decode('utf-8', errors)
+    
+    @staticmethod
+    def extract_message_body(payload: Dict[str, Any], max_chars: Optional[int] = None) -> str:
         """
         Extract readable text content from a Gmail message payload.
         
         Args:
             payload: Gmail message payload dictionary
+            max_chars: Decode only enough of the body for a preview of this length
             
         Returns:
             Extracted text content, preferring plain text over HTML
@@ -134,18 +174,16 @@ class EmailContentExtractor:
         
         try:
             if 'parts' in payload:
-                # Multi-part message
-                for part in payload['parts']:
-                    if part['mimeType'] == 'text/plain' and part['body'].get('data'):
-                        data = part['body']['data']
-                        body = base64.urlsafe_b64decode(data).decode('utf-8')
-                        break
-                    elif part['mimeType'] == 'text/html' and not body and part['body'].get('data'):
-                        data = part['body']['data']
-                        body = base64.urlsafe_b64decode(data).decode('utf-8')
+                # Multi-part message: pick plain text if any part has it, else HTML,
+                # and decode only the chosen part
+                parts = [part for part in payload['parts'] if part['body'].get('data')]
+                chosen = (next((part for part in parts if part['mimeType'] == 'text/plain'), None)
+                          or next((part for part in parts if part['mimeType'] == 'text/html'), None))
+                if chosen:
+                    body = EmailContentExtractor.decode_body_data(chosen['body']['data'], max_chars)
             elif payload['body'].get('data'):
                 # Simple message
-                body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
+                body = EmailContentExtractor.decode_body_data(payload['body']['data'], max_chars)
                 
         except Exception as e:
             print(f"⚠️ Warning: Could not extract message body: {e}")
@@ -173,14 +211,87 @@ class EmailContentExtractor:
             'date': 'Unknown Date'
         }
         
+        remaining = set(EmailContentExtractor.WANTED_HEADERS)
         for header in headers:
-            name = header['name'].lower()
-            if name in ['subject', 'from', 'to', 'date']:
+            name = header['name']
+            # Fast reject: no wanted header is longer than "subject"
+            if len(name) > 7:
+                continue
+            name = name.lower()
+            if name in remaining:
                 extracted[name] = header['value']
+                remaining.discard(name)
+                if not remaining:
+                    break
         
         return extracted
 
 
+# Date format of Gmail's after:/before: search operators
+QUERY_DATE_FORMAT = "%Y/%m/%d"
+
+
+# ==================== RETRY HELPERS ====================
+
+# Gmail statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_TRIES = 5
+RETRY_BASE_DELAY = 0.5
+
+
+def _is_retryable(error: Any) -> bool:
+    """Check whether a Gmail API error is transient."""
+    return isinstance(error, HttpError) and error.resp.status in RETRYABLE_STATUSES
+
+
+def _retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, 1) * RETRY_BASE_DELAY * 2 ** attempt
+
+
+def _retry(max_tries: int = MAX_TRIES):
+    """Retry a function raising HttpError on rate-limit and server errors, with backoff."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return func(*args, **kwargs)
+                except HttpError as error:
+                    if not _is_retryable(error) or attempt == max_tries - 1:
+                        raise
+                    delay = _retry_delay(attempt)
+                    print(f"⏳ Gmail returned {error.resp.status}, retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+@_retry()
+def _execute(request, http=None):
+    """Execute a Gmail API request (or batch), retrying transient errors."""
+    return request.execute(http=http)
+
+
+@lru_cache(maxsize=4)
+def _authenticate(scopes: Tuple[str, ...], credentials_file: str, token_file: str) -> Credentials:
+    """Authenticate once per process for a scope set and token file."""
+    return GmailAuthenticator(list(scopes), credentials_file, token_file).authenticate()
+
+
+@lru_cache(maxsize=4)
+def _build_service(scopes: Tuple[str, ...], credentials_file: str, token_file: str):
+    """Build the Gmail API service once per process, shared by every GmailClient."""
+    # The Gmail discovery document ships with googleapiclient, so no discovery
+    # request or discovery cache lookup is needed
+    return build(
+        "gmail", "v1",
+        credentials=_authenticate(scopes, credentials_file, token_file),
+        static_discovery=True,
+        cache_discovery=False
+    )
+
+
 class GmailClient:
     """
     Comprehensive Gmail API client for reading and managing emails.
@@ -195,24 +306,57 @@ class GmailClient:
         "https://www.googleapis.com/auth/gmail.modify"
     ]
     
-    def __init__(self, scopes: Optional[List[str]] = None):
+    # Maximum number of calls Gmail accepts in one batch HTTP request
+    BATCH_SIZE = 100
+    
+    # Threads requested per threads().list page
+    LIST_PAGE_SIZE = 100
+    
+    # Largest page threads().list allows
+    MAX_LIST_PAGE_SIZE = 500
+    
+    # Maximum number of message IDs Gmail accepts in one messages.batchModify call
+    BATCH_MODIFY_SIZE = 1000
+    
+    # Characters of the latest message kept in EmailSummary.content_preview
+    PREVIEW_LENGTH = 500
+    
+    # Partial-response masks limiting Gmail replies to the fields this client reads
+    THREAD_LIST_FIELDS = "threads/id,nextPageToken"
+    THREAD_FIELDS = "id,messages(id,payload(mimeType,headers(name,value),body,parts(mimeType,body)))"
+    
+    # Socket timeout in seconds for worker-thread HTTP connections
+    HTTP_TIMEOUT = 30
+    
+    # Worker threads used when falling back to concurrent single requests
+    FALLBACK_WORKERS = 20
+    
+    def __init__(self, scopes: Optional[List[str]] = None, verbose: bool = True):
         """
         Initialize the Gmail client.
         
         Args:
             scopes: List of Gmail API scopes. Uses default if None.
+            verbose: Display each email as it is read
         """
         self.scopes = scopes or self.DEFAULT_SCOPES
+        self.verbose = verbose
         self.authenticator = GmailAuthenticator(self.scopes)
         self.content_extractor = EmailContentExtractor()
         self._service = None
+        self._label_cache: Optional[Dict[str, str]] = None  # lowercase name -> label ID
+        self._local = threading.local()  # per-thread HTTP connections for worker threads
+    
+    @property
+    def _auth_key(self) -> Tuple[Tuple[str, ...], str, str]:
+        """Key identifying this client's credentials in the process-wide caches."""
+        return tuple(self.scopes), self.authenticator.credentials_file, self.authenticator.token_file
     
     @property
     def service(self):
-        """Get Gmail API service, creating it if necessary."""
+        """Get Gmail API service, reusing the process-wide one for these credentials."""
         if not self._service:
-            credentials = self.authenticator.authenticate()
-            self._service = build("gmail", "v1", credentials=credentials)
+            self._service = _build_service(*self._auth_key)
         return self._service
     
     # ==================== EMAIL READING METHODS ====================
@@ -227,21 +371,68 @@ class GmailClient:
         Returns:
             List of EmailSummary objects for latest threads
         """
+        return list(self.iter_latest_emails(count))
+    
+    def iter_latest_emails(self, count: int = 10) -> Iterator[EmailSummary]:
+        """
+        Yield the latest email threads one batch at a time.
+        
+        Only one batch of thread details is held in memory at once, and callers
+        can stop iterating early to skip fetching the remaining batches.
+        
+        Args:
+            count: Maximum number of threads to retrieve
+            
+        Yields:
+            EmailSummary objects for latest threads
+        """
         print(f"📧 Reading latest {count} email threads...")
         
         try:
             # Get thread list
-            results = self.service.users().threads().list(
+            results = _execute(self.service.users().threads().list(
                 userId="me", 
-                maxResults=count
-            ).execute()
+                maxResults=count,
+                fields=self.THREAD_LIST_FIELDS
+            ))
+            threads = results.get("threads", [])
+            
+            if not threads:
+                print("📭 No emails found.")
+                return
+            
+            yield from self._iter_thread_summaries(threads, f"LATEST {count}")
+            
+        except HttpError as error:
+            print(f"❌ Error reading emails: {error}")
+    
+    async def read_latest_emails_async(self, count: int = 10) -> List[EmailSummary]:
+        """
+        Read the latest email threads without blocking the event loop.
+        
+        Args:
+            count: Maximum number of threads to retrieve
+            
+        Returns:
+            List of EmailSummary objects for latest threads
+        """
+        print(f"📧 Reading latest {count} email threads...")
+        
+        try:
+            # Get thread list
+            results = await asyncio.to_thread(
+                _execute,
+                self.service.users().threads().list(
+                    userId="me", maxResults=count, fields=self.THREAD_LIST_FIELDS
+                )
+            )
             threads = results.get("threads", [])
             
             if not threads:
                 print("📭 No emails found.")
                 return []
             
-            return self._process_threads(threads, f"LATEST {count}")
+            return await self._process_threads_async(threads, f"LATEST {count}")
             
         except HttpError as error:
             print(f"❌ Error reading emails: {error}")
@@ -260,105 +451,423 @@ class GmailClient:
         Returns:
             List of EmailSummary objects for the time period
         """
-        # Calculate time parameters
-        if hours_ago is not None:
-            days_ago = hours_ago / 24.0
-            time_description = f"last {hours_ago} hours"
-        else:
-            time_description = f"last {days_ago} days"
-        
+        query, time_description = self._time_period_query(days_ago, hours_ago)
         print(f"📧 Searching for emails from the {time_description}...")
         
         try:
-            # Create Gmail date query
-            target_date = datetime.now() - timedelta(days=days_ago)
-            after_date = target_date.strftime("%Y/%m/%d")
-            query = f"after:{after_date}"
-            
             print(f"🔍 Query: {query}")
             
             # Get threads with date filter
-            results = self.service.users().threads().list(
-                userId="me", 
-                maxResults=count,
-                q=query
-            ).execute()
-            threads = results.get("threads", [])
+            results = self._list_threads_page(query, min(count, self.LIST_PAGE_SIZE))
             
-            if not threads:
+            if not results.get("threads"):
                 print(f"📭 No emails found from the {time_description}.")
                 return []
             
-            print(f"✅ Found {len(threads)} conversation(s) from the {time_description}")
-            return self._process_threads(threads, time_description.upper())
+            return self._process_thread_pages(results, query, count, time_description)
             
         except HttpError as error:
             print(f"❌ Error reading emails: {error}")
             return []
     
-    def _process_threads(self, threads: List[Dict], context: str) -> List[EmailSummary]:
+    def read_messages_by_time_period(self, days_ago: int = 1, hours_ago: Optional[int] = None,
+                                     count: int = 50) -> List[EmailSummary]:
         """
-        Process thread data into EmailSummary objects and display them.
+        Read individual messages from a time period, headers only.
+        
+        Lighter than read_emails_by_time_period: messages are not grouped into
+        threads and no body is downloaded, so content_preview is empty.
         
         Args:
-            threads: List of thread dictionaries from Gmail API
-            context: Context string for display (e.g., "LATEST 10")
+            days_ago: Number of days ago to search from
+            hours_ago: Number of hours ago to search from (overrides days_ago)
+            count: Maximum number of messages to return
             
         Returns:
-            List of processed EmailSummary objects
+            List of EmailSummary objects with empty previews
         """
+        query, time_description = self._time_period_query(days_ago, hours_ago)
+        print(f"📧 Searching for messages from the {time_description}...")
+        
+        try:
+            results = _execute(self.service.users().messages().list(
+                userId="me",
+                maxResults=min(count, self.MAX_LIST_PAGE_SIZE),
+                q=query,
+                fields="messages/id"
+            ))
+            message_ids = [message['id'] for message in results.get("messages", [])]
+            
+            if not message_ids:
+                print(f"📭 No emails found from the {time_description}.")
+                return []
+            
+            print(f"✅ Found {len(message_ids)} message(s) from the {time_description}")
+            messages = self._fetch_message_metadata_batch(message_ids)
+            
+        except HttpError as error:
+            print(f"❌ Error reading emails: {error}")
+            return []
+        
         email_summaries = []
+        output = []
+        for index, message_id in enumerate(message_ids, 1):
+            message = messages.get(message_id)
+            if not isinstance(message, dict):
+                output.append(f"❌ Error processing message {message_id}: {message}\n")
+                continue
+            
+            headers = self.content_extractor.extract_headers(message['payload'])
+            summary = EmailSummary(
+                subject=headers['subject'],
+                sender=headers['from'],
+                date=headers['date'],
+                thread_id=message['threadId'],
+                message_id=message_id,
+                message_count=1,
+                content_preview=""
+            )
+            email_summaries.append(summary)
+            if self.verbose:
+                output.append(self._format_email_summary(summary, index, time_description.upper()))
         
-        for i, thread in enumerate(threads):
-            try:
-                # Get full thread details
-                thread_data = self.service.users().threads().get(
-                    userId="me", 
-                    id=thread['id']
-                ).execute()
-                
-                messages_in_thread = thread_data['messages']
-                latest_message = messages_in_thread[-1]
+        # One write for all records instead of several prints per email
+        sys.stdout.write("".join(output))
+        return email_summaries
+    
+    def _fetch_message_metadata_batch(self, message_ids: List[str]) -> Dict[str, Union[Dict, HttpError]]:
+        """
+        Fetch Subject/From/Date headers for messages using batch HTTP requests.
+        
+        Args:
+            message_ids: IDs of the messages to fetch
+            
+        Returns:
+            Dictionary mapping each message ID to its metadata, or to the HttpError it raised
+        """
+        return self._execute_batch([
+            (message_id, self.service.users().messages().get(
+                userId="me",
+                id=message_id,
+                format="metadata",
+                metadataHeaders=["Subject", "From", "Date"],
+                fields="id,threadId,payload/headers"
+            ))
+            for message_id in message_ids
+        ])
+    
+    @staticmethod
+    def _time_period_query(days_ago: int, hours_ago: Optional[int]) -> Tuple[str, str]:
+        """
+        Build the Gmail search query for a time period.
+        
+        Returns:
+            Tuple of (query, human-readable time description)
+        """
+        # Calculate time parameters
+        if hours_ago is not None:
+            days_ago = hours_ago / 24.0
+            time_description = f"last {hours_ago} hours"
+        else:
+            time_description = f"last {days_ago} days"
+        
+        # Create Gmail date query from the local date
+        after_date = time.strftime(QUERY_DATE_FORMAT, time.localtime(time.time() - days_ago * 86400))
+        return f"after:{after_date}", time_description
+    
+    def _fetch_thread_ids(self, count: int, query: Optional[str] = None) -> List[str]:
+        """
+        List thread IDs only, without fetching any thread contents.
+        
+        Args:
+            count: Maximum number of thread IDs to return
+            query: Gmail search query (latest threads if None)
+            
+        Returns:
+            List of thread IDs, newest first
+        """
+        thread_ids = []
+        page_token = None
+        try:
+            while len(thread_ids) < count:
+                results = _execute(self.service.users().threads().list(
+                    userId="me",
+                    maxResults=min(count - len(thread_ids), self.MAX_LIST_PAGE_SIZE),
+                    q=query,
+                    pageToken=page_token,
+                    fields=self.THREAD_LIST_FIELDS
+                ))
+                thread_ids.extend(thread['id'] for thread in results.get("threads", []))
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
+        except HttpError as error:
+            print(f"❌ Error listing threads: {error}")
+        return thread_ids
+    
+    def _list_threads_page(self, query: str, page_size: int, page_token: Optional[str] = None,
+                           from_worker: bool = False) -> Dict:
+        """Fetch one page of thread IDs matching a query."""
+        request = self.service.users().threads().list(
+            userId="me",
+            maxResults=page_size,
+            q=query,
+            pageToken=page_token,
+            fields=self.THREAD_LIST_FIELDS
+        )
+        return _execute(request, http=self._thread_local_http() if from_worker else None)
+    
+    def _process_thread_pages(self, results: Dict, query: str, count: int,
+                              time_description: str) -> List[EmailSummary]:
+        """
+        Process thread list pages, fetching the next page while the current one is processed.
+        
+        Args:
+            results: First page returned by _list_threads_page
+            query: Gmail search query the page came from
+            count: Maximum number of threads to process
+            time_description: Description of the time period for display
+            
+        Returns:
+            List of processed EmailSummary objects across all pages
+        """
+        email_summaries = []
+        listed = 0
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                threads = results.get("threads", [])[:count - listed]
+                if listed == 0:
+                    print(f"✅ Found {len(threads)} conversation(s) from the {time_description}")
+                else:
+                    print(f"📄 Fetched {len(threads)} more conversation(s)")
                 
-                # Extract headers and content
-                headers = self.content_extractor.extract_headers(latest_message['payload'])
-                content = self.content_extractor.extract_message_body(latest_message['payload'])
+                page_token = results.get("nextPageToken")
+                next_page = None
+                if page_token and listed + len(threads) < count:
+                    # The prefetch runs on the worker's own connection; httplib2 is not thread-safe
+                    next_page = executor.submit(
+                        self._list_threads_page, query,
+                        min(count - listed - len(threads), self.LIST_PAGE_SIZE),
+                        page_token, True
+                    )
                 
-                # Create summary object
-                summary = EmailSummary(
-                    subject=headers['subject'],
-                    sender=headers['from'],
-                    date=headers['date'],
-                    thread_id=thread['id'],
-                    message_id=latest_message['id'],
-                    message_count=len(messages_in_thread),
-                    content_preview=content[:500] + "..." if len(content) > 500 else content
+                email_summaries.extend(
+                    self._process_threads(threads, time_description.upper(), start_index=listed + 1)
                 )
+                listed += len(threads)
                 
-                email_summaries.append(summary)
-                
-                # Display the email
-                self._display_email_summary(summary, i + 1, context)
-                
-            except HttpError as error:
-                print(f"❌ Error processing thread {thread.get('id', 'unknown')}: {error}")
+                if next_page is None:
+                    return email_summaries
+                results = next_page.result()
+    
+    def _fetch_threads_batch(self, thread_ids: List[str]) -> Dict[str, Union[Dict, HttpError]]:
+        """
+        Fetch full thread details using Gmail batch HTTP requests.
+        
+        Args:
+            thread_ids: IDs of the threads to fetch
+            
+        Returns:
+            Dictionary mapping each thread ID to its data, or to the HttpError it raised
+        """
+        return self._execute_batch([
+            (thread_id, self.service.users().threads().get(
+                userId="me", id=thread_id, fields=self.THREAD_FIELDS
+            ))
+            for thread_id in thread_ids
+        ])
+    
+    def _execute_batch(self, requests: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        """
+        Execute requests as Gmail batch HTTP requests of up to BATCH_SIZE calls.
+        
+        Calls that fail with a rate-limit or server error are re-queued into a
+        new batch after a backoff, up to MAX_TRIES attempts.
+        
+        Args:
+            requests: List of (request_id, request) pairs; request IDs must be unique
+            
+        Returns:
+            Dictionary mapping each request ID to its response, or to the HttpError it raised
+        """
+        responses = {}
+        
+        def on_response(request_id, response, exception):
+            responses[request_id] = exception if exception is not None else response
+        
+        pending = requests
+        for attempt in range(MAX_TRIES):
+            for start in range(0, len(pending), self.BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for request_id, request in pending[start:start + self.BATCH_SIZE]:
+                    batch.add(request, request_id=request_id)
+                _execute(batch)
+            
+            pending = [(request_id, request) for request_id, request in pending
+                       if _is_retryable(responses[request_id])]
+            if not pending or attempt == MAX_TRIES - 1:
+                break
+            delay = _retry_delay(attempt)
+            print(f"⏳ Retrying {len(pending)} rate-limited request(s) in {delay:.1f}s...")
+            time.sleep(delay)
+        
+        return responses
+    
+    def _build_email_summary(self, thread_id: str, thread_data: Dict) -> EmailSummary:
+        """Build an EmailSummary from the latest message of a thread."""
+        messages_in_thread = thread_data['messages']
+        latest_message = messages_in_thread[-1]
+        
+        # Extract headers and content
+        headers = self.content_extractor.extract_headers(latest_message['payload'])
+        content = self.content_extractor.extract_message_body(
+            latest_message['payload'], max_chars=self.PREVIEW_LENGTH
+        )
+        
+        return EmailSummary(
+            subject=headers['subject'],
+            sender=headers['from'],
+            date=headers['date'],
+            thread_id=thread_id,
+            message_id=latest_message['id'],
+            message_count=len(messages_in_thread),
+            content_preview=(content[:self.PREVIEW_LENGTH] + "..."
+                             if len(content) > self.PREVIEW_LENGTH else content)
+        )
+    
+    def _thread_local_http(self) -> AuthorizedHttp:
+        """
+        Get this worker thread's own authorized HTTP connection.
+        
+        httplib2 is not thread-safe, so requests executed from worker threads
+        use one connection per thread, reused across that thread's requests.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(_authenticate(*self._auth_key), http=httplib2.Http(timeout=self.HTTP_TIMEOUT))
+            self._local.http = http
+        return http
+    
+    def _get_thread_with_own_http(self, thread_id: str) -> Dict:
+        """Fetch one thread from a worker thread on that thread's own HTTP connection."""
+        request = self.service.users().threads().get(userId="me", id=thread_id, fields=self.THREAD_FIELDS)
+        return _execute(request, http=self._thread_local_http())
+    
+    async def _fetch_threads_concurrently(self, thread_ids: List[str]) -> Dict[str, Union[Dict, Exception]]:
+        """
+        Fetch full thread details with concurrent single requests.
+        
+        Args:
+            thread_ids: IDs of the threads to fetch
+            
+        Returns:
+            Dictionary mapping each thread ID to its data, or to the error it raised
+        """
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.FALLBACK_WORKERS) as executor:
+            results = await asyncio.gather(
+                *[loop.run_in_executor(executor, self._get_thread_with_own_http, thread_id)
+                  for thread_id in thread_ids],
+                return_exceptions=True
+            )
+        return dict(zip(thread_ids, results))
+    
+    def _summarize_threads(self, thread_ids: List[str], thread_details: Dict,
+                           context: str, start_index: int = 1) -> List[EmailSummary]:
+        """Build and display summaries in list order, skipping threads that failed."""
+        email_summaries = []
+        output = []
+        
+        for index, thread_id in enumerate(thread_ids, start_index):
+            thread_data = thread_details.get(thread_id)
+            if not isinstance(thread_data, dict):
+                output.append(f"❌ Error processing thread {thread_id}: {thread_data}\n")
+                continue
+            
+            summary = self._build_email_summary(thread_id, thread_data)
+            email_summaries.append(summary)
+            
+            # Display the email
+            if self.verbose:
+                output.append(self._format_email_summary(summary, index, context))
         
+        # One write per batch instead of several prints per email
+        sys.stdout.write("".join(output))
         return email_summaries
     
-    def _display_email_summary(self, summary: EmailSummary, index: int, context: str):
-        """Display a formatted email summary."""
-        print(f"\n=== CONVERSATION {index} ({context}) ===")
-        print(f"Subject: {summary.subject}")
-        print(f"From: {summary.sender}")
-        print(f"Date: {summary.date}")
-        print(f"Messages in thread: {summary.message_count}")
-        print("Latest message content:")
-        print(summary.content_preview)
+    def _iter_thread_summaries(self, threads: List[Dict], context: str,
+                               start_index: int = 1) -> Iterator[EmailSummary]:
+        """Fetch, build and display thread summaries one batch at a time."""
+        thread_ids = [thread['id'] for thread in threads]
+        for start in range(0, len(thread_ids), self.BATCH_SIZE):
+            chunk = thread_ids[start:start + self.BATCH_SIZE]
+            yield from self._summarize_threads(
+                chunk, self._fetch_threads_batch(chunk), context, start_index + start
+            )
+    
+    def _process_threads(self, threads: List[Dict], context: str,
+                         start_index: int = 1) -> List[EmailSummary]:
+        """
+        Process thread data into EmailSummary objects and display them.
+        
+        Thread details are fetched in batch HTTP requests rather than one
+        round-trip per thread.
+        
+        Args:
+            threads: List of thread dictionaries from Gmail API
+            context: Context string for display (e.g., "LATEST 10")
+            start_index: Display number of the first thread
+            
+        Returns:
+            List of processed EmailSummary objects
+        """
+        return list(self._iter_thread_summaries(threads, context, start_index))
+    
+    async def _process_threads_async(self, threads: List[Dict], context: str) -> List[EmailSummary]:
+        """
+        Async version of _process_threads.
+        
+        Uses the batch endpoint first and falls back to concurrent single
+        requests if Gmail rejects the batch (400/404).
+        
+        Args:
+            threads: List of thread dictionaries from Gmail API
+            context: Context string for display (e.g., "LATEST 10")
+            
+        Returns:
+            List of processed EmailSummary objects
+        """
+        thread_ids = [thread['id'] for thread in threads]
+        try:
+            thread_details = await asyncio.to_thread(self._fetch_threads_batch, thread_ids)
+        except HttpError as error:
+            if error.resp.status not in (400, 404):
+                raise
+            print(f"⚠️ Batch request failed ({error.resp.status}), fetching threads concurrently...")
+            thread_details = await self._fetch_threads_concurrently(thread_ids)
+        
+        return self._summarize_threads(thread_ids, thread_details, context)
+    
+    @staticmethod
+    def _format_email_summary(summary: EmailSummary, index: int, context: str) -> str:
+        """Format an email summary as display text."""
+        lines = [
+            f"\n=== CONVERSATION {index} ({context}) ===",
+            f"Subject: {summary.subject}",
+            f"From: {summary.sender}",
+            f"Date: {summary.date}",
+            f"Messages in thread: {summary.message_count}",
+            "Latest message content:",
+            summary.content_preview,
+        ]
         
         if summary.message_count > 1:
-            print(f"\n[This is part of a conversation with {summary.message_count} messages]")
+            lines.append(f"\n[This is part of a conversation with {summary.message_count} messages]")
         
-        print("=" * 50)
+        lines.append("=" * 50)
+        return "\n".join(lines) + "\n"
+
     
     # ==================== EMAIL MANAGEMENT METHODS ====================
     
@@ -373,14 +882,15 @@ class GmailClient:
             Label ID if successful, None if failed
         """
         try:
-            # Search for existing label
-            results = self.service.users().labels().list(userId="me").execute()
-            labels = results.get("labels", [])
+            # Search for existing label, listing labels only on first use
+            if self._label_cache is None:
+                results = _execute(self.service.users().labels().list(userId="me"))
+                self._cache_labels(results.get("labels", []))
             
-            for label in labels:
-                if label["name"].lower() == label_name.lower():
-                    print(f"✅ Found existing label: {label_name}")
-                    return label["id"]
+            label_id = self._label_cache.get(label_name.lower())
+            if label_id:
+                print(f"✅ Found existing label: {label_name}")
+                return label_id
             
             # Create new label
             label_object = {
@@ -389,18 +899,29 @@ class GmailClient:
                 "messageListVisibility": "show"
             }
             
-            created_label = self.service.users().labels().create(
+            created_label = _execute(self.service.users().labels().create(
                 userId="me", 
                 body=label_object
-            ).execute()
+            ))
             
+            self._label_cache[label_name.lower()] = created_label["id"]
             print(f"🏷️ Created new label: {label_name}")
             return created_label["id"]
             
         except HttpError as error:
+            # The cache may be stale (e.g. label created elsewhere); refetch next time
+            self.invalidate_labels()
             print(f"❌ Error with label '{label_name}': {error}")
             return None
     
+    def _cache_labels(self, labels: List[Dict[str, Any]]):
+        """Replace the cached label name -> ID mapping."""
+        self._label_cache = {label["name"].lower(): label["id"] for label in labels}
+    
+    def invalidate_labels(self):
+        """Drop the cached labels, e.g. after labels were changed outside this client."""
+        self._label_cache = None
+    
     def apply_label_to_emails(self, label_name: str, email_ids: Optional[List[str]] = None, 
                             thread_ids: Optional[List[str]] = None) -> OperationResult:
         """
@@ -435,38 +956,18 @@ class GmailClient:
         processed_items = []
         errors = []
         
+        # Drop repeated IDs (order-preserving) so nothing is modified twice
+        email_ids = list(dict.fromkeys(email_ids or []))
+        thread_ids = list(dict.fromkeys(thread_ids or []))
+        
         try:
             # Apply label to individual emails
             if email_ids:
-                for email_id in email_ids:
-                    try:
-                        self.service.users().messages().modify(
-                            userId="me",
-                            id=email_id,
-                            body={"addLabelIds": [label_id]}
-                        ).execute()
-                        processed_items.append(email_id)
-                        print(f"✅ Applied '{label_name}' to email {email_id}")
-                    except HttpError as error:
-                        error_msg = f"Failed to label email {email_id}: {error}"
-                        errors.append(error_msg)
-                        print(f"❌ {error_msg}")
+                self._label_messages(email_ids, label_id, label_name, processed_items, errors)
             
             # Apply label to entire threads
             if thread_ids:
-                for thread_id in thread_ids:
-                    try:
-                        self.service.users().threads().modify(
-                            userId="me",
-                            id=thread_id,
-                            body={"addLabelIds": [label_id]}
-                        ).execute()
-                        processed_items.append(f"thread_{thread_id}")
-                        print(f"✅ Applied '{label_name}' to thread {thread_id}")
-                    except HttpError as error:
-                        error_msg = f"Failed to label thread {thread_id}: {error}"
-                        errors.append(error_msg)
-                        print(f"❌ {error_msg}")
+                self._label_threads(thread_ids, label_id, label_name, processed_items, errors)
             
             result = OperationResult(
                 success=len(processed_items) > 0,
@@ -486,6 +987,62 @@ class GmailClient:
                 errors=errors + [str(error)]
             )
     
+    def _label_messages(self, email_ids: List[str], label_id: str, label_name: str,
+                        processed_items: List[str], errors: List[str]):
+        """
+        Add a label to messages with batchModify, up to BATCH_MODIFY_SIZE IDs per call.
+        
+        If a batchModify call fails, its chunk is retried one message at a time
+        so that failures are attributed to the individual emails.
+        """
+        for start in range(0, len(email_ids), self.BATCH_MODIFY_SIZE):
+            chunk = email_ids[start:start + self.BATCH_MODIFY_SIZE]
+            try:
+                _execute(self.service.users().messages().batchModify(
+                    userId="me",
+                    body={"ids": chunk, "addLabelIds": [label_id]}
+                ))
+                processed_items.extend(chunk)
+                print(f"✅ Applied '{label_name}' to {len(chunk)} emails")
+            except HttpError as error:
+                print(f"⚠️ batchModify failed ({error}), labeling {len(chunk)} emails individually...")
+                self._label_each("email", chunk, label_id, label_name, processed_items, errors)
+    
+    def _label_threads(self, thread_ids: List[str], label_id: str, label_name: str,
+                       processed_items: List[str], errors: List[str]):
+        """Add a label to threads (Gmail has no threads batchModify)."""
+        self._label_each("thread", thread_ids, label_id, label_name, processed_items, errors)
+    
+    def _label_each(self, kind: str, item_ids: List[str], label_id: str, label_name: str,
+                    processed_items: List[str], errors: List[str]):
+        """
+        Add a label with one modify call per email or thread, sent as batch HTTP requests.
+        
+        Args:
+            kind: "email" or "thread"
+            item_ids: Unique IDs of the emails or threads to label
+            label_id: ID of the label to add
+            label_name: Name of the label, for messages
+            processed_items: List to append successfully labeled items to
+            errors: List to append error messages to
+        """
+        resource = self.service.users().messages() if kind == "email" else self.service.users().threads()
+        
+        responses = self._execute_batch([
+            (item_id, resource.modify(userId="me", id=item_id, body={"addLabelIds": [label_id]}))
+            for item_id in item_ids
+        ])
+        
+        for item_id in item_ids:
+            response = responses[item_id]
+            if isinstance(response, HttpError):
+                error_msg = f"Failed to label {kind} {item_id}: {response}"
+                errors.append(error_msg)
+                print(f"❌ {error_msg}")
+            else:
+                processed_items.append(item_id if kind == "email" else f"thread_{item_id}")
+                print(f"✅ Applied '{label_name}' to {kind} {item_id}")
+    
     def list_labels(self) -> List[Dict[str, Any]]:
         """
         List all available labels in the Gmail account.
@@ -494,8 +1051,9 @@ class GmailClient:
             List of label dictionaries
         """
         try:
-            results = self.service.users().labels().list(userId="me").execute()
+            results = _execute(self.service.users().labels().list(userId="me"))
             labels = results.get("labels", [])
+            self._cache_labels(labels)
             
             print("📋 Available Gmail Labels:")
             print("=" * 40)
@@ -561,37 +1119,44 @@ class GmailClient:
         """Mark the latest emails with specified label."""
         print(f"🏷️ Marking the latest {count} emails as '{label_name}'...")
         
-        emails = self.read_latest_emails(count=count)
-        if not emails:
+        # Labeling needs thread IDs only, so skip fetching and decoding the threads
+        thread_ids = self._fetch_thread_ids(count)
+        if not thread_ids:
             return OperationResult(False, "No emails found", [], ["No emails to mark"])
         
-        thread_ids = [email.thread_id for email in emails]
         return self.label_email_threads(thread_ids, label_name)
     
     def mark_time_period_as_important(self, days_ago: int = 1, hours_ago: Optional[int] = None, 
-                                    label_name: str = "Important") -> OperationResult:
+                                    label_name: str = "Important", count: int = 50) -> OperationResult:
         """Mark emails from a time period with specified label."""
-        time_desc = f"last {hours_ago} hours" if hours_ago else f"last {days_ago} days"
+        query, time_desc = self._time_period_query(days_ago, hours_ago)
         print(f"🏷️ Marking emails from the {time_desc} as '{label_name}'...")
         
-        emails = self.read_emails_by_time_period(days_ago=days_ago, hours_ago=hours_ago)
-        if not emails:
+        # Labeling needs thread IDs only, so skip fetching and decoding the threads
+        thread_ids = self._fetch_thread_ids(count, query)
+        if not thread_ids:
             return OperationResult(False, f"No emails found from {time_desc}", [], [])
         
-        thread_ids = [email.thread_id for email in emails]
         return self.label_email_threads(thread_ids, label_name)
     
-    # Quick access methods for common time periods
-    def read_today(self) -> List[EmailSummary]:
+    # Quick access methods for common time periods; include_preview=False reads
+    # message headers only, which is much lighter than fetching whole threads
+    def read_today(self, include_preview: bool = True) -> List[EmailSummary]:
         """Read emails from today (last 24 hours)."""
+        if not include_preview:
+            return self.read_messages_by_time_period(hours_ago=24)
         return self.read_emails_by_time_period(hours_ago=24)
     
-    def read_this_week(self) -> List[EmailSummary]:
+    def read_this_week(self, include_preview: bool = True) -> List[EmailSummary]:
         """Read emails from the last 7 days."""
+        if not include_preview:
+            return self.read_messages_by_time_period(days_ago=7)
         return self.read_emails_by_time_period(days_ago=7)
     
-    def read_this_month(self) -> List[EmailSummary]:
+    def read_this_month(self, include_preview: bool = True) -> List[EmailSummary]:
         """Read emails from the last 30 days."""
+        if not include_preview:
+            return self.read_messages_by_time_period(days_ago=30)
         return self.read_emails_by_time_period(days_ago=30)
 
 
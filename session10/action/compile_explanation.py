@@ -219,11 +219,20 @@ print("✓ Same result, but allows transformation between compile and exec")
 
 print("\nMethod 3: AST transformation (like executor)")
 print("-" * 70)
+
+
+class Rewrite10(ast.NodeTransformer):
+    """Single-pass rewrite, same style as the executor's KeywordStripper/AwaitTransformer."""
+    def visit_Constant(self, node):
+        if node.value == 10:
+            node.value = 20  # Transform: 10 → 20
+        return node
+
+
 tree = ast.parse(code_string)
 # Transform AST here (e.g., change 10 to 20)
-for node in ast.walk(tree):
-    if isinstance(node, ast.Constant) and node.value == 10:
-        node.value = 20  # Transform: 10 → 20
+tree = Rewrite10().visit(tree)
+ast.fix_missing_locations(tree)
 
 compiled = compile(tree, "<test>", "exec")
 namespace3 = {}
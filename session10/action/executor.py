@@ -5,6 +5,8 @@ import time
 import builtins
 import textwrap
 import re
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
 
 # ───────────────────────────────────────────────────────────────
@@ -15,17 +17,21 @@ ALLOWED_MODULES = {
 }
 MAX_FUNCTIONS = 5
 TIMEOUT_PER_FUNCTION = 500  # seconds
+COMPILE_CACHE_SIZE = 256  # compiled snippets kept (LRU)
+
+def _strip_keywords(node: ast.Call) -> ast.Call:
+    if node.keywords:
+        # Convert all keyword arguments into positional args (discard names)
+        for kw in node.keywords:
+            node.args.append(kw.value)
+        node.keywords = []
+    return node
 
 class KeywordStripper(ast.NodeTransformer):
     """Rewrite all function calls to remove keyword args and keep only values as positional."""
     def visit_Call(self, node):
         self.generic_visit(node)
-        if node.keywords:
-            # Convert all keyword arguments into positional args (discard names)
-            for kw in node.keywords:
-                node.args.append(kw.value)
-            node.keywords = []
-        return node
+        return _strip_keywords(node)
 
 
 # ───────────────────────────────────────────────────────────────
@@ -37,15 +43,27 @@ class AwaitTransformer(ast.NodeTransformer):
 
     def visit_Call(self, node):
         self.generic_visit(node)
+        return self._await_tool(node)
+
+    def _await_tool(self, node):
         if isinstance(node.func, ast.Name) and node.func.id in self.async_funcs:
-            return ast.Await(value=node)
+            return ast.copy_location(ast.Await(value=node), node)
         return node
 
+
+# ───────────────────────────────────────────────────────────────
+# AST TRANSFORMER: both rewrites above in a single tree walk
+# ───────────────────────────────────────────────────────────────
+class UserCodeTransformer(AwaitTransformer):
+    """KeywordStripper + AwaitTransformer fused, so user code is traversed once."""
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        return self._await_tool(_strip_keywords(node))
+
 # ───────────────────────────────────────────────────────────────
 # UTILITY FUNCTIONS
 # ───────────────────────────────────────────────────────────────
-def count_function_calls(code: str) -> int:
-    tree = ast.parse(code)
+def count_function_calls(tree: ast.AST) -> int:
     return sum(isinstance(node, ast.Call) for node in ast.walk(tree))
 
 def build_safe_globals(mcp_funcs: dict, multi_mcp=None) -> dict:
@@ -77,6 +95,66 @@ def build_safe_globals(mcp_funcs: dict, multi_mcp=None) -> dict:
     return safe_globals
 
 
+
+# ───────────────────────────────────────────────────────────────
+# COMPILE CACHE: reuse code objects for repeated snippets
+# ───────────────────────────────────────────────────────────────
+_compile_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# Shared by every "__main" wrapper; compile() only reads it and it has no locations to fix
+_EMPTY_ARGS = ast.arguments(posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[])
+
+
+def compile_user_code(code: str, async_funcs: frozenset) -> tuple:
+    """Return (function call count, compiled wrapper) for a snippet, memoized by source and tool set."""
+    key = hashlib.blake2b(
+        "\0".join([code, *sorted(async_funcs)]).encode(), digest_size=16
+    ).hexdigest()
+    cached = _compile_cache.get(key)
+    if cached is not None:
+        _compile_cache.move_to_end(key)
+        return cached
+
+    cleaned_code = textwrap.dedent(code.strip())
+    tree = ast.parse(cleaned_code)
+
+    func_count = count_function_calls(tree)
+    if func_count > MAX_FUNCTIONS:
+        return func_count, None  # not cached: rejected before it is ever compiled
+
+    has_return = any(isinstance(node, ast.Return) for node in tree.body)
+    has_result = any(
+        isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "result" for t in node.targets
+        )
+        for node in tree.body
+    )
+    if not has_return and has_result:
+        auto_return = ast.Return(value=ast.Name(id="result", ctx=ast.Load()))
+        tree.body.append(ast.fix_missing_locations(ast.copy_location(auto_return, tree.body[-1])))
+
+    # strip "key" = "value" cases to only "value" and auto-await MCP tools
+    tree = UserCodeTransformer(async_funcs).visit(tree)
+
+    func_def = ast.AsyncFunctionDef(
+        name="__main",
+        args=_EMPTY_ARGS,
+        body=tree.body,
+        decorator_list=[],
+        lineno=1,
+        col_offset=0,
+    )
+    # Parsed nodes keep their locations and new ones copy them, so no full-tree fix_missing_locations pass
+    wrapper = ast.Module(body=[func_def], type_ignores=[])
+
+    # Not optimized: asserts in generated code check tool results and must still raise
+    compiled = compile(wrapper, filename="<user_code>", mode="exec")
+    _compile_cache[key] = (func_count, compiled)
+    if len(_compile_cache) > COMPILE_CACHE_SIZE:
+        _compile_cache.popitem(last=False)
+    return func_count, compiled
+
+
 # ───────────────────────────────────────────────────────────────
 # MAIN EXECUTOR
 # ───────────────────────────────────────────────────────────────
@@ -85,7 +163,12 @@ async def run_user_code(code: str, multi_mcp) -> dict:
     start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     try:
-        func_count = count_function_calls(code)
+        tool_funcs = {
+            tool.name: make_tool_proxy(tool.name, multi_mcp)
+            for tool in multi_mcp.get_all_tools()
+        }
+
+        func_count, compiled = compile_user_code(code, frozenset(tool_funcs))
         if func_count > MAX_FUNCTIONS:
             return {
                 "status": "error",
@@ -94,41 +177,9 @@ async def run_user_code(code: str, multi_mcp) -> dict:
                 "total_time": str(round(time.perf_counter() - start_time, 3))
             }
 
-        tool_funcs = {
-            tool.name: make_tool_proxy(tool.name, multi_mcp)
-            for tool in multi_mcp.get_all_tools()
-        }
-
         sandbox = build_safe_globals(tool_funcs, multi_mcp)
         local_vars = {}
 
-        cleaned_code = textwrap.dedent(code.strip())
-        tree = ast.parse(cleaned_code)
-
-        has_return = any(isinstance(node, ast.Return) for node in tree.body)
-        has_result = any(
-            isinstance(node, ast.Assign) and any(
-                isinstance(t, ast.Name) and t.id == "result" for t in node.targets
-            )
-            for node in tree.body
-        )
-        if not has_return and has_result:
-            tree.body.append(ast.Return(value=ast.Name(id="result", ctx=ast.Load())))
-
-        tree = KeywordStripper().visit(tree) # strip "key" = "value" cases to only "value"
-        tree = AwaitTransformer(set(tool_funcs)).visit(tree)
-        ast.fix_missing_locations(tree)
-
-        func_def = ast.AsyncFunctionDef(
-            name="__main",
-            args=ast.arguments(posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[]),
-            body=tree.body,
-            decorator_list=[]
-        )
-        wrapper = ast.Module(body=[func_def], type_ignores=[])
-        ast.fix_missing_locations(wrapper)
-
-        compiled = compile(wrapper, filename="<user_code>", mode="exec")
         exec(compiled, sandbox, local_vars)
 
         try:
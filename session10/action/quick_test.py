@@ -3,6 +3,7 @@ Quick test to understand the executor - simple examples
 """
 
 import asyncio
+import math
 from action.executor import run_user_code
 
 
@@ -14,23 +15,19 @@ class MockTool:
 
 
 class MockMultiMCP:
-    def __init__(self):
+    def __init__(self, simulate_latency: bool = False):
+        self.simulate_latency = simulate_latency
         self.tools = [MockTool("add"), MockTool("multiply")]
         self.tool_map = {t.name: {"tool": t, "config": {}} for t in self.tools}
+        self._dispatch = {"add": lambda *args: sum(args), "multiply": lambda *args: math.prod(args)}
     
     def get_all_tools(self):
         return self.tools
     
     async def function_wrapper(self, tool_name: str, *args):
-        await asyncio.sleep(0.01)
-        if tool_name == "add":
-            return sum(args) if args else 0
-        elif tool_name == "multiply":
-            result = 1
-            for arg in args:
-                result *= arg
-            return result
-        return f"Result from {tool_name}"
+        await asyncio.sleep(0.01 if self.simulate_latency else 0)
+        fn = self._dispatch.get(tool_name)
+        return fn(*args) if fn else f"Result from {tool_name}"
 
 
 async def main():
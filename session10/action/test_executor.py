@@ -4,6 +4,8 @@ Shows examples of what works and what doesn't.
 """
 
 import asyncio
+import io
+import math
 from action.executor import run_user_code
 
 
@@ -26,7 +28,8 @@ class MockTool:
 
 class MockMultiMCP:
     """Mock MultiMCP for testing without real MCP servers"""
-    def __init__(self):
+    def __init__(self, simulate_latency: bool = False):
+        self.simulate_latency = simulate_latency
         self.tool_map = {}
         # Create some mock tools
         self.tools = [
@@ -36,53 +39,66 @@ class MockMultiMCP:
         ]
         for tool in self.tools:
             self.tool_map[tool.name] = {"tool": tool, "config": {}}
+        self._dispatch = {
+            "add": lambda *args: sum(args),
+            "multiply": lambda *args: math.prod(args),
+            "greet": lambda *args: f"Hello, {args[0] if args else 'World'}!",
+        }
     
     def get_all_tools(self):
         return self.tools
     
     async def function_wrapper(self, tool_name: str, *args):
         """Mock function wrapper that simulates tool execution"""
-        await asyncio.sleep(0.01)  # Simulate async delay
+        # Yield to the event loop like a real tool; only sleep when latency is wanted
+        await asyncio.sleep(0.01 if self.simulate_latency else 0)
         
-        if tool_name == "add":
-            return sum(args) if args else 0
-        elif tool_name == "multiply":
-            result = 1
-            for arg in args:
-                result *= arg
-            return result
-        elif tool_name == "greet":
-            return f"Hello, {args[0] if args else 'World'}!"
-        else:
+        fn = self._dispatch.get(tool_name)
+        if fn is None:
             return f"Mock result from {tool_name} with args: {args}"
+        return fn(*args)
+
+
+# Stateless, so one instance is shared by every test_example call (including concurrent ones)
+_SHARED_MOCK = MockMultiMCP()
 
 
 # ───────────────────────────────────────────────────────────────
 # TEST EXAMPLES
 # ───────────────────────────────────────────────────────────────
 
-async def test_example(description: str, code: str, expected_status: str = "success"):
-    """Run a test example and print results"""
-    print(f"\n{'='*70}")
-    print(f"TEST: {description}")
-    print(f"{'='*70}")
-    print(f"Code:\n{code}")
-    print(f"\nExpected Status: {expected_status}")
-    print("-" * 70)
+async def test_example(description: str, code: str, expected_status: str = "success", out=None,
+                       mock_mcp=_SHARED_MOCK):
+    """Run a test example and print results (to `out` if given, else stdout)"""
+    print(f"\n{'='*70}", file=out)
+    print(f"TEST: {description}", file=out)
+    print(f"{'='*70}", file=out)
+    print(f"Code:\n{code}", file=out)
+    print(f"\nExpected Status: {expected_status}", file=out)
+    print("-" * 70, file=out)
     
-    mock_mcp = MockMultiMCP()
     result = await run_user_code(code, mock_mcp)
     
-    print(f"Status: {result['status']}")
+    print(f"Status: {result['status']}", file=out)
     if result['status'] == 'success':
-        print(f"Result: {result.get('result', 'None')}")
+        print(f"Result: {result.get('result', 'None')}", file=out)
     else:
-        print(f"Error: {result.get('error', 'Unknown error')}")
-    print(f"Execution Time: {result.get('total_time', 'N/A')}s")
+        print(f"Error: {result.get('error', 'Unknown error')}", file=out)
+    print(f"Execution Time: {result.get('total_time', 'N/A')}s", file=out)
     
     return result
 
 
+async def run_batch(examples):
+    """Run (description, code[, expected_status]) examples concurrently, printing reports in order"""
+    buffers = [io.StringIO() for _ in examples]
+    await asyncio.gather(*(
+        test_example(*example, out=buffer) for example, buffer in zip(examples, buffers)
+    ))
+    for buffer in buffers:
+        print(buffer.getvalue(), end="")
+
+
 async def run_all_tests():
     """Run all test examples"""
     
@@ -99,102 +115,104 @@ async def run_all_tests():
     print("✅ WORKING EXAMPLES")
     print("="*70)
     
-    # Example 1: Basic arithmetic
-    await test_example(
-        "Basic arithmetic operations",
-        """
+    await run_batch([
+        # Example 1: Basic arithmetic
+        (
+            "Basic arithmetic operations",
+            """
 result = 2 + 2
 result = result * 3
 """
-    )
+        ),
     
-    # Example 2: Using allowed modules
-    await test_example(
-        "Using math module (allowed)",
-        """
+        # Example 2: Using allowed modules
+        (
+            "Using math module (allowed)",
+            """
 import math
 result = math.sqrt(16) + math.pi
 """
-    )
+        ),
     
-    # Example 3: Lists and dictionaries
-    await test_example(
-        "Working with lists and dicts",
-        """
+        # Example 3: Lists and dictionaries
+        (
+            "Working with lists and dicts",
+            """
 numbers = [1, 2, 3, 4, 5]
 result = sum(numbers)
 data = {"key": "value", "num": 42}
 result = f"{result} and {data['num']}"
 """
-    )
+        ),
     
-    # Example 4: Using MCP tools (automatically awaited)
-    await test_example(
-        "Calling MCP tools (auto-awaited)",
-        """
+        # Example 4: Using MCP tools (automatically awaited)
+        (
+            "Calling MCP tools (auto-awaited)",
+            """
 result = add(10, 20)
 """
-    )
+        ),
     
-    # Example 5: Multiple MCP tool calls
-    await test_example(
-        "Multiple MCP tool calls",
-        """
+        # Example 5: Multiple MCP tool calls
+        (
+            "Multiple MCP tool calls",
+            """
 a = add(5, 3)
 b = multiply(4, 2)
 result = a + b
 """
-    )
+        ),
     
-    # Example 6: Using json module
-    await test_example(
-        "Using json module",
-        """
+        # Example 6: Using json module
+        (
+            "Using json module",
+            """
 import json
 data = {"name": "test", "value": 123}
 result = json.dumps(data)
 """
-    )
+        ),
     
-    # Example 7: String operations
-    await test_example(
-        "String operations",
-        """
+        # Example 7: String operations
+        (
+            "String operations",
+            """
 text = "Hello World"
 result = text.upper().replace("WORLD", "Python")
 """
-    )
+        ),
     
-    # Example 8: List comprehensions
-    await test_example(
-        "List comprehensions",
-        """
+        # Example 8: List comprehensions
+        (
+            "List comprehensions",
+            """
 numbers = [1, 2, 3, 4, 5]
 squared = [x * x for x in numbers]
 result = sum(squared)
 """
-    )
+        ),
     
-    # Example 9: Explicit return statement
-    await test_example(
-        "Explicit return statement",
-        """
+        # Example 9: Explicit return statement
+        (
+            "Explicit return statement",
+            """
 def calculate():
     return 10 * 2
 
 result = calculate()
 """
-    )
+        ),
     
-    # Example 10: Using datetime
-    await test_example(
-        "Using datetime module",
-        """
+        # Example 10: Using datetime
+        (
+            "Using datetime module",
+            """
 from datetime import datetime
 now = datetime.now()
 result = now.strftime("%Y-%m-%d")
 """
-    )
+        ),
+    ])
     
     # ───────────────────────────────────────────────────────────────
     # ❌ FAILING EXAMPLES
@@ -204,61 +222,74 @@ result = now.strftime("%Y-%m-%d")
     print("❌ FAILING EXAMPLES (Expected to fail)")
     print("="*70)
     
-    # Example 1: Too many function calls
-    await test_example(
-        "Too many function calls (>5 limit)",
-        """
+    await run_batch([
+        # Example 1: Too many function calls
+        (
+            "Too many function calls (>5 limit)",
+            """
 result = add(1, 1) + add(2, 2) + add(3, 3) + add(4, 4) + add(5, 5) + add(6, 6)
 """,
-        expected_status="error"
-    )
+            "error"
+        ),
     
-    # Example 2: Keyword arguments (will be stripped, may cause issues)
-    await test_example(
-        "Keyword arguments (stripped to positional)",
-        """
+        # Example 2: Keyword arguments (will be stripped, may cause issues)
+        (
+            "Keyword arguments (stripped to positional)",
+            """
 # Note: Keyword args are converted to positional, order matters!
 result = add(x=10, y=20)  # This becomes add(10, 20)
 """,
-        expected_status="success"  # May still work if args match positionally
-    )
+            "success"  # May still work if args match positionally
+        ),
     
-    # Example 3: Restricted module
-    await test_example(
-        "Trying to import restricted module (os)",
-        """
+        # Example 3: Restricted module
+        (
+            "Trying to import restricted module (os)",
+            """
 import os
 result = os.getcwd()
 """,
-        expected_status="error"
-    )
+            "error"
+        ),
     
-    # Example 4: Restricted builtin
-    await test_example(
-        "Trying to use restricted builtin (open)",
-        """
+        # Example 4: Restricted builtin
+        (
+            "Trying to use restricted builtin (open)",
+            """
 result = open("test.txt", "r")
 """,
-        expected_status="error"
-    )
+            "error"
+        ),
     
-    # Example 5: Using eval (not in allowed builtins)
-    await test_example(
-        "Trying to use eval (not allowed)",
-        """
+        # Example 5: Using eval (not in allowed builtins)
+        (
+            "Trying to use eval (not allowed)",
+            """
 result = eval("2 + 2")
 """,
-        expected_status="error"
-    )
+            "error"
+        ),
     
-    # Example 6: Syntax error
-    await test_example(
-        "Syntax error in code",
-        """
+        # Example 6: Syntax error
+        (
+            "Syntax error in code",
+            """
 result = 2 + 
 """,
-        expected_status="error"
-    )
+            "error"
+        ),
+    
+        # Example 7: Failing assert (asserts are kept, not optimized away)
+        (
+            "Failing assert on a tool result",
+            """
+total = add(2, 2)
+assert total == 5, "unexpected total"
+result = total
+""",
+            "error"
+        ),
+    ])
     
     # ───────────────────────────────────────────────────────────────
     # 🔍 EDGE CASES
@@ -268,48 +299,50 @@ result = 2 +
     print("🔍 EDGE CASES")
     print("="*70)
     
-    # Example 1: Empty code
-    await test_example(
-        "Empty code",
-        """
+    await run_batch([
+        # Example 1: Empty code
+        (
+            "Empty code",
+            """
 # Just a comment
 result = None
 """
-    )
+        ),
     
-    # Example 2: Code with only assignment, no return
-    await test_example(
-        "Assignment to 'result' (auto-return added)",
-        """
+        # Example 2: Code with only assignment, no return
+        (
+            "Assignment to 'result' (auto-return added)",
+            """
 result = "This will be automatically returned"
 """
-    )
+        ),
     
-    # Example 3: Code with return statement
-    await test_example(
-        "Explicit return (no auto-return needed)",
-        """
+        # Example 3: Code with return statement
+        (
+            "Explicit return (no auto-return needed)",
+            """
 x = 10
 return x * 2
 """
-    )
+        ),
     
-    # Example 4: Nested function calls
-    await test_example(
-        "Nested function calls",
-        """
+        # Example 4: Nested function calls
+        (
+            "Nested function calls",
+            """
 result = add(multiply(2, 3), multiply(4, 5))
 """
-    )
+        ),
     
-    # Example 5: Using parallel helper (if available)
-    await test_example(
-        "Using parallel execution helper",
-        """
+        # Example 5: Using parallel helper (if available)
+        (
+            "Using parallel execution helper",
+            """
 # Note: parallel() is available if multi_mcp is provided
 result = "parallel() function available"
 """
-    )
+        ),
+    ])
 
 
 async def interactive_test():
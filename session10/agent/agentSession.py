@@ -28,6 +28,19 @@ class PerceptionSnapshot:
     solution_summary: str
     confidence: str
 
+    def to_dict(self):
+        return {
+            "entities": self.entities,
+            "result_requirement": self.result_requirement,
+            "original_goal_achieved": self.original_goal_achieved,
+            "reasoning": self.reasoning,
+            "local_goal_achieved": self.local_goal_achieved,
+            "local_reasoning": self.local_reasoning,
+            "last_tooluse_summary": self.last_tooluse_summary,
+            "solution_summary": self.solution_summary,
+            "confidence": self.confidence
+        }
+
 @dataclass
 class Step:
     index: int
@@ -52,7 +65,7 @@ class Step:
             "conclusion": self.conclusion,
             "execution_result": self.execution_result,
             "error": self.error,
-            "perception": self.perception.__dict__ if self.perception else None,
+            "perception": self.perception.to_dict() if self.perception else None,
             "status": self.status,
             "attempts": self.attempts,
             "was_replanned": self.was_replanned,
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
+import logging
 import uuid
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Dict, List, Optional
 
 from action.executor import run_user_code
 from agent.agentSession import AgentSession, PerceptionSnapshot, Step, ToolCode
-from agent.context_builders import build_decision_context, build_perception_context
+from agent.context_builders import PerceptionBlob, build_decision_context, build_perception_context
 from decision.decision_modified import Decision
 from mcp_servers.multiMCP import MultiMCP
 from perception.perception_modified import Perception
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+_DEFAULT_PERCEPTION = MappingProxyType(
+    {
+        "entities": [],
+        "result_requirement": "N/A",
+        "original_goal_achieved": False,
+        "reasoning": "",
+        "local_goal_achieved": False,
+        "local_reasoning": "",
+        "last_tooluse_summary": "",
+        "solution_summary": "Not ready yet",
+        "confidence": "0.0",
+    }
+)
+
+
+@dataclass(slots=True)
 class LoopBlock:
     name: str
     context: Optional[dict] = None
@@ -31,6 +49,8 @@ class AgentLoopModified:
         decision_prompt_path: str = "prompts/decision_prompt.yaml",
         multi_mcp: Optional[MultiMCP] = None,
         strategy: str = "exploratory",
+        completed_steps_window: Optional[int] = None,
+        max_steps: Optional[int] = None,
     ):
         if multi_mcp is None:
             raise ValueError("A MultiMCP instance is required for the agent loop.")
@@ -39,20 +59,22 @@ class AgentLoopModified:
         self.decision = Decision(decision_prompt_path)
         self.multi_mcp = multi_mcp
         self.strategy = strategy
+        self.completed_steps_window = completed_steps_window  # None sends every completed step
+        self.max_steps = max_steps  # None lets Decision run until it concludes
         self.blocks: Dict[str, LoopBlock] = {
             "perception": LoopBlock("perception"),
             "decision": LoopBlock("decision"),
         }
-        self._cached_tool_descriptions: Optional[List[str]] = None
 
     async def run(self, query: str) -> AgentSession:
         session = AgentSession(session_id=str(uuid.uuid4()), original_query=query)
 
         perception_ctx = build_perception_context(original_user_query=query)
         initial_perception = self._record_block(
+            self.blocks,
             "perception",
             perception_ctx,
-            self.perception.get_perception_output(perception_ctx),
+            await self.perception.get_perception_output(perception_ctx),
         )
         perception_snapshot = PerceptionSnapshot(**self._normalize_perception_output(initial_perception))
         session.add_perception(perception_snapshot)
@@ -61,30 +83,35 @@ class AgentLoopModified:
             session.mark_complete(perception_snapshot, perception_snapshot.solution_summary)
             return session
 
+        # Re-encodes only the perception fields that changed since the previous decision turn
+        perception_blob = PerceptionBlob()
         decision_ctx = build_decision_context(
             plan_mode="initial",
             planning_strategy=self.strategy,
             original_user_query=query,
-            perception_object=initial_perception,
+            perception_object=perception_blob.update(initial_perception),
             current_plan_text=[],
             completed_steps=[],
             recent_step_feedback="Initial planning request.",
             available_tools=self._get_available_tools(),
+            placeholders=self.decision.prompt_template["placeholders"],
         )
 
         decision_output = self._record_block(
+            self.blocks,
             "decision",
             decision_ctx,
-            self.decision.get_decision_output(decision_ctx),
+            await self.decision.get_decision_output(decision_ctx),
         )
         current_step = self._store_plan_and_return_step(session, decision_output)
+        current_plan_text = session.plan_versions[-1]["plan_text"] if session.plan_versions else []
         completed_steps: List[Step] = []
 
         while current_step:
             if current_step.type == "CODE":
-                await self._execute_code_step(query, session, current_step)
+                await self._execute_code_step(query, session, current_step, current_plan_text)
             elif current_step.type == "CONCLUDE":
-                self._process_conclusion_step(query, session, current_step)
+                await self._process_conclusion_step(query, session, current_step, current_plan_text)
                 break
             else:  # NOP / clarification request
                 session.state.update(
@@ -100,46 +127,62 @@ class AgentLoopModified:
             completed_steps.append(current_step)
             if session.state["original_goal_achieved"]:
                 break
+            if self.max_steps is not None and len(completed_steps) >= self.max_steps:
+                # Out of steps: stop here rather than spend a decision call on a step we won't run
+                summary = current_step.perception.solution_summary if current_step.perception else ""
+                session.state.update(
+                    {
+                        "original_goal_achieved": False,
+                        "final_answer": current_step.execution_result or summary,
+                        "confidence": 0.0,
+                        "reasoning_note": f"Stopped after reaching the {self.max_steps}-step limit.",
+                        "solution_summary": summary,
+                    }
+                )
+                break
 
-            perception_payload = current_step.perception.__dict__ if current_step.perception else {}
+            perception_payload = current_step.perception.to_dict() if current_step.perception else {}
             decision_ctx = build_decision_context(
                 plan_mode="mid_session",
                 planning_strategy=self.strategy,
                 original_user_query=query,
-                perception_object=perception_payload,
-                current_plan_text=session.plan_versions[-1]["plan_text"],
+                perception_object=perception_blob.update(perception_payload),
+                current_plan_text=current_plan_text,
                 completed_steps=completed_steps,
                 recent_step_feedback=self._build_recent_feedback(current_step),
                 available_tools=self._get_available_tools(),
+                completed_steps_window=self.completed_steps_window,
+                placeholders=self.decision.prompt_template["placeholders"],
             )
             decision_output = self._record_block(
+                self.blocks,
                 "decision",
                 decision_ctx,
-                self.decision.get_decision_output(decision_ctx),
+                await self.decision.get_decision_output(decision_ctx),
             )
             current_step = self._store_plan_and_return_step(session, decision_output)
+            current_plan_text = session.plan_versions[-1]["plan_text"]
 
         return session
 
-    def _record_block(self, name: str, context: dict, output: dict) -> dict:
-        block = self.blocks.setdefault(name, LoopBlock(name))
+    @staticmethod
+    def _record_block(blocks: Dict[str, LoopBlock], name: str, context: dict, output: dict) -> dict:
+        block = blocks.get(name)
+        if block is None:
+            block = blocks[name] = LoopBlock(name)
         return block.update(context=context, output=output)
 
     def _normalize_perception_output(self, payload: Optional[dict]) -> dict:
-        defaults = {
-            "entities": [],
-            "result_requirement": "N/A",
-            "original_goal_achieved": False,
-            "reasoning": "",
-            "local_goal_achieved": False,
-            "local_reasoning": "",
-            "last_tooluse_summary": "",
-            "solution_summary": "Not ready yet",
-            "confidence": "0.0",
-        }
-        if payload:
-            defaults.update({k: payload.get(k, defaults[k]) for k in defaults})
-        return defaults
+        # Common case: the LLM returned exactly the schema, nothing to fill in or drop
+        if payload and payload.keys() == _DEFAULT_PERCEPTION.keys():
+            normalized = dict(payload)
+        else:
+            normalized = dict(_DEFAULT_PERCEPTION)
+            if payload:
+                normalized.update({k: payload[k] for k in _DEFAULT_PERCEPTION.keys() & payload.keys()})
+        # entities gets a fresh list per call so snapshots never share one
+        normalized["entities"] = list(normalized["entities"] or [])
+        return normalized
 
     def _store_plan_and_return_step(self, session: AgentSession, decision_output: dict) -> Optional[Step]:
         if not decision_output:
@@ -153,10 +196,10 @@ class AgentLoopModified:
 
         expected_index = session.get_next_step_index()
         proposed_index = next_step.get("step_index")
-        if not isinstance(proposed_index, int) or proposed_index < expected_index:
+        try:
+            step_index = max(expected_index, int(proposed_index))
+        except (TypeError, ValueError):  # missing or non-numeric index from the LLM
             step_index = expected_index
-        else:
-            step_index = proposed_index
 
         step_type = next_step.get("type", "NOP")
         step_code = next_step.get("code", "")
@@ -171,7 +214,9 @@ class AgentLoopModified:
         session.add_plan_version(plan_text if isinstance(plan_text, list) else [plan_text], [step])
         return step
 
-    async def _execute_code_step(self, query: str, session: AgentSession, step: Step) -> None:
+    async def _execute_code_step(
+        self, query: str, session: AgentSession, step: Step, plan_text: List[str]
+    ) -> None:
         if not step.code:
             step.status = "failed"
             step.error = "Missing code payload."
@@ -179,21 +224,22 @@ class AgentLoopModified:
 
         executor_response = await run_user_code(step.code.tool_arguments.get("code", ""), self.multi_mcp)
 
-        print(f"\n\n\n\n\nExecutor Response: {executor_response}\n\n\n\n\n")
+        logger.debug("Executor response: %s", executor_response)
         step.execution_result = executor_response.get("result")
         step.error = executor_response.get("error")
         step.status = "completed" if executor_response.get("status") == "success" else "failed"
 
         perception_ctx = build_perception_context(
             original_user_query=query,
-            plan_from_decision_agent=session.plan_versions[-1]["plan_text"],
+            plan_from_decision_agent=plan_text,
             current_step_index=step.index,
             result_of_current_step=step.execution_result or step.error or "Tool execution returned no output.",
         )
         perception_output = self._record_block(
+            self.blocks,
             "perception",
             perception_ctx,
-            self.perception.get_perception_output(perception_ctx),
+            await self.perception.get_perception_output(perception_ctx),
         )
         perception_snapshot = PerceptionSnapshot(**self._normalize_perception_output(perception_output))
         step.perception = perception_snapshot
@@ -201,17 +247,20 @@ class AgentLoopModified:
         if perception_snapshot.original_goal_achieved:
             session.mark_complete(perception_snapshot, step.execution_result)
 
-    def _process_conclusion_step(self, query: str, session: AgentSession, step: Step) -> None:
+    async def _process_conclusion_step(
+        self, query: str, session: AgentSession, step: Step, plan_text: List[str]
+    ) -> None:
         perception_ctx = build_perception_context(
             original_user_query=query,
-            plan_from_decision_agent=session.plan_versions[-1]["plan_text"] if session.plan_versions else [],
+            plan_from_decision_agent=plan_text,
             current_step_index=step.index,
             result_of_current_step=step.conclusion or "Conclusion provided with no summary.",
         )
         perception_output = self._record_block(
+            self.blocks,
             "perception",
             perception_ctx,
-            self.perception.get_perception_output(perception_ctx),
+            await self.perception.get_perception_output(perception_ctx),
         )
         perception_snapshot = PerceptionSnapshot(**self._normalize_perception_output(perception_output))
         step.perception = perception_snapshot
@@ -221,21 +270,15 @@ class AgentLoopModified:
         result_text = step.execution_result or ""
         error_text = step.error or ""
         perception_summary = step.perception.solution_summary if step.perception else ""
-        return "\n".join(
-            filter(
-                None,
-                [
-                    f"Step {step.index}: {step.description}",
-                    f"Status: {step.status}",
-                    f"Result: {result_text}" if result_text else None,
-                    f"Error: {error_text}" if error_text else None,
-                    f"Perception: {perception_summary}" if perception_summary else None,
-                ],
-            )
-        )
+        parts = [f"Step {step.index}: {step.description}", f"Status: {step.status}"]
+        if result_text:
+            parts.append(f"Result: {result_text}")
+        if error_text:
+            parts.append(f"Error: {error_text}")
+        if perception_summary:
+            parts.append(f"Perception: {perception_summary}")
+        return "\n".join(parts)
 
     def _get_available_tools(self) -> List[str]:
-        if self._cached_tool_descriptions is None:
-            self._cached_tool_descriptions = self.multi_mcp.tool_description_wrapper()
-        return self._cached_tool_descriptions
+        return self.multi_mcp.tool_description_wrapper()
 
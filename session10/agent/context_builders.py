@@ -1,22 +1,71 @@
 from __future__ import annotations
 
-import json
-from typing import Iterable, Sequence
+from typing import Container, Iterable, Sequence
 
 from agent.agentSession import Step
+from utils.json_utils import dumps
 
 __all__ = [
+    "PerceptionBlob",
     "build_perception_context",
     "build_decision_context",
 ]
 
 
+class PerceptionBlob:
+    """Perception fields with each field's pretty-printed JSON cached separately.
+
+    Adjacent decision turns usually change only one or two perception fields
+    (confidence, last_tooluse_summary), so update() keeps the encoded text of
+    unchanged fields and render() just joins the pieces. The rendered text is
+    equivalent JSON to dumps(perception, indent=True); see utils.json_utils for
+    how the orjson encoding differs from json.dumps.
+    """
+
+    __slots__ = ("_fields",)
+
+    def __init__(self) -> None:
+        self._fields: dict[str, tuple[object, str]] = {}
+
+    def update(self, perception: dict) -> "PerceptionBlob":
+        fields = {}
+        for key, value in perception.items():
+            cached = self._fields.get(key)
+            # type check too, so True/1 or 1/1.0 never reuse each other's encoding
+            if cached is not None and type(cached[0]) is type(value) and cached[0] == value:
+                fields[key] = cached
+            else:
+                encoded = dumps(value, indent=True).replace("\n", "\n  ")
+                fields[key] = (value, f"  {dumps(key)}: {encoded}")
+        self._fields = fields
+        return self
+
+    def render(self) -> str:
+        if not self._fields:
+            return "{}"
+        return "{\n" + ",\n".join(encoded for _, encoded in self._fields.values()) + "\n}"
+
+
+def _to_dict(obj):
+    # Fallback encoder for Step/PerceptionSnapshot/ToolCode; orjson encodes these
+    # dataclasses natively (same fields, same order) without calling it
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 def _stringify(value) -> str:
     if value is None:
         return ""
     if isinstance(value, str):
         return value
-    return json.dumps(value, ensure_ascii=False, indent=2)
+    if isinstance(value, PerceptionBlob):
+        return value.render()
+    return dumps(value, indent=True, default=_to_dict)
+
+
+def _uses(placeholders: Container[str] | None, key: str) -> bool:
+    return placeholders is None or key in placeholders
 
 
 def build_perception_context(
@@ -52,14 +101,26 @@ def build_decision_context(
     plan_mode: str,
     planning_strategy: str,
     original_user_query: str,
-    perception_object: dict,
+    perception_object: dict | PerceptionBlob,
     current_plan_text: Sequence[str] | None,
     completed_steps: Sequence[Step] | None,
     recent_step_feedback: str | None,
     available_tools: Iterable[str] | None,
+    completed_steps_window: int | None = None,
+    placeholders: Container[str] | None = None,
 ) -> dict:
     plan_text = "\n".join(current_plan_text) if current_plan_text else "[]"
-    completed = [step.to_dict() for step in completed_steps] if completed_steps else []
+    # The JSON fields are the costly ones: serialize each only if the template shows it
+    perception_text = _stringify(perception_object) if _uses(placeholders, "perception_object") else ""
+    # Completed steps grow every turn; keep only the most recent completed_steps_window
+    # of them if a window is set
+    if not _uses(placeholders, "completed_steps"):
+        completed_text = ""
+    else:
+        steps = completed_steps or []
+        if completed_steps_window is not None:
+            steps = steps[max(len(steps) - completed_steps_window, 0):]
+        completed_text = _stringify(list(steps))
     tools_text = "\n".join(available_tools) if available_tools else "No registered tools."
     feedback_text = recent_step_feedback or "No feedback yet."
 
@@ -67,9 +128,9 @@ def build_decision_context(
         "plan_mode": plan_mode,
         "planning_strategy": planning_strategy,
         "original_user_query": original_user_query,
-        "perception_object": _stringify(perception_object),
+        "perception_object": perception_text,
         "current_plan_text": plan_text,
-        "completed_steps": _stringify(completed),
+        "completed_steps": completed_text,
         "recent_step_feedback": feedback_text,
         "available_tools": tools_text,
     }
@@ -1,6 +1,12 @@
-from utils import generate_llm_response,get_final_prompt,parse_response,read_yaml_template,log_prompt
+from utils import agenerate_llm_response,discard_cached_response,get_final_prompt,parse_response,read_yaml_template,log_prompt,RETRY_HINT
+import logging
 from enum import Enum
-from pprint import pprint
+from pprint import pformat
+from typing import List, Optional, Union
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
 
 class DecisionContextKeys(Enum):
     PLAN_MODE = "plan_mode"
@@ -13,22 +19,55 @@ class DecisionContextKeys(Enum):
     AVAILABLE_TOOLS = "available_tools"
 
 
+_REQUIRED_KEYS = frozenset(key.value for key in DecisionContextKeys)
+
+
+class NextStepResponse(BaseModel):
+    step_index: Optional[int] = None
+    description: str = "No description provided."
+    type: str = "NOP"
+    code: str = ""
+    conclusion: Optional[str] = None
+
+
+class DecisionResponse(BaseModel):
+    """Decision output format, also sent to Gemini as the response schema.
+
+    next_step is the only required field.
+    """
+
+    plan_text: Union[List[str], str] = []
+    next_step: NextStepResponse
+
+
 class Decision:
     def __init__(self,prompt_template_path: str):
         self.prompt_template_path = prompt_template_path
         self.prompt_template = read_yaml_template(prompt_template_path)
 
-    def get_decision_output(self,context: dict) -> dict:
-        for key in DecisionContextKeys:
-            if key.value not in context:
-                raise ValueError(f"Context must contain {key.value}")
+    async def get_decision_output(self,context: dict) -> dict:
+        missing = _REQUIRED_KEYS.difference(context)
+        if missing:
+            raise ValueError(f"Context must contain {', '.join(sorted(missing))}")
         final_prompt = get_final_prompt(self.prompt_template,context)
 
         log_prompt("Decision", final_prompt)
-        response = generate_llm_response(final_prompt['system_prompt'], final_prompt['formatted_user_prompt'])
-        json_response = parse_response(response)
-        print(f"\n\n\n\n\nDecision Output\n\n\n\n\n")
-        pprint(json_response)
+        response = await agenerate_llm_response(final_prompt['system_prompt'], final_prompt['formatted_user_prompt'], response_schema=DecisionResponse)
+        try:
+            json_response = parse_response(response, DecisionResponse)
+        except ValueError as e:
+            # Discard the malformed output and ask once more, telling the model what was wrong
+            logger.debug("Retrying decision after invalid output: %s", e)
+            discard_cached_response(final_prompt['system_prompt'], final_prompt['formatted_user_prompt'], response_schema=DecisionResponse)
+            response = await agenerate_llm_response(
+                final_prompt['system_prompt'],
+                final_prompt['formatted_user_prompt'] + RETRY_HINT.format(error=e),
+                use_cache=False,
+                response_schema=DecisionResponse,
+            )
+            json_response = parse_response(response, DecisionResponse)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Decision Output\n%s", pformat(json_response))
         return json_response
 
 if __name__ == "__main__":
@@ -65,7 +104,8 @@ if __name__ == "__main__":
     
     
     decision = Decision(prompt_template_path="prompts/decision_prompt.yaml")
-    decision_output = decision.get_decision_output(example_context)
+    import asyncio
+    decision_output = asyncio.run(decision.get_decision_output(example_context))
     print(decision_output)
 
     write_json_file(decision_output, "decision_output.json")
\ No newline at end of file
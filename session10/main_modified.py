@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import yaml
 
 from dotenv import load_dotenv
@@ -35,7 +36,8 @@ async def interactive() -> None:
     )
 
     while True:
-        query = input("🟢  You: ").strip()
+        # Read input on a worker thread so the event loop keeps serving MCP/LLM tasks
+        query = (await asyncio.to_thread(input, "🟢  You: ")).strip()
         if query.lower() in {"exit", "quit"}:
             print("👋  Goodbye!")
             break
@@ -43,12 +45,15 @@ async def interactive() -> None:
         response = await loop.run(query)
         print(f"🔵 Agent: {response.state['solution_summary']}\n")
 
-        follow = input("\n\nContinue? (press Enter) or type 'exit': ").strip()
+        follow = (await asyncio.to_thread(input, "\n\nContinue? (press Enter) or type 'exit': ")).strip()
         if follow.lower() in {"exit", "quit"}:
             print("👋  Goodbye!")
             break
 
 
 if __name__ == "__main__":
+    # Show the prompts sent to the LLM (utils.log_prompt logs them at INFO)
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("utils").setLevel(logging.INFO)
     asyncio.run(interactive())
 
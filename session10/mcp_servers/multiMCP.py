@@ -47,6 +47,7 @@ class MultiMCP:
         self.server_configs = server_configs
         self.tool_map: Dict[str, Dict[str, Any]] = {}
         self.server_tools: Dict[str, List[Any]] = {}
+        self._tool_descriptions: Optional[List[str]] = None  # rebuilt when tool_map changes
 
     async def initialize(self):
         print("in MultiMCP initialize")
@@ -72,6 +73,7 @@ class MultiMCP:
                                     "config": config,
                                     "tool": tool
                                 }
+                                self._tool_descriptions = None
                                 server_key = config["id"]
                                 if server_key not in self.server_tools:
                                     self.server_tools[server_key] = []
@@ -165,6 +167,8 @@ class MultiMCP:
 
     def tool_description_wrapper(self) -> List[str]:
         """Format tool usage as: tool(type, type)  # description"""
+        if self._tool_descriptions is not None:
+            return self._tool_descriptions
         examples = []
         for tool in self.get_all_tools():
             schema = tool.inputSchema
@@ -181,6 +185,7 @@ class MultiMCP:
 
             signature_str = ", ".join(arg_types)
             examples.append(f"{tool.name}({signature_str})  # {tool.description}")
+        self._tool_descriptions = examples
         return examples
 
 
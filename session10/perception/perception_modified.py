@@ -1,11 +1,20 @@
 from utils import (
+    agenerate_llm_response,
+    discard_cached_response,
     generate_llm_response,
     get_final_prompt,
     parse_response,
     read_yaml_template,
     log_prompt,
+    RETRY_HINT,
 )
+import logging
 from enum import Enum
+from typing import List, Union
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
 
 
 # Write an enum for perception context keys
@@ -17,26 +26,60 @@ class PerceptionContextKeys(Enum):
     RESULT_OF_CURRENT_STEP = "result_of_current_step"
 
 
+_REQUIRED_KEYS = frozenset(key.value for key in PerceptionContextKeys)
+
+
+class PerceptionResponse(BaseModel):
+    """Perception output format, also sent to Gemini as the response schema.
+
+    Missing fields get the agent loop's defaults.
+    """
+
+    entities: List[str] = []
+    result_requirement: str = "N/A"
+    original_goal_achieved: bool = False
+    reasoning: str = ""
+    local_goal_achieved: bool = False
+    local_reasoning: str = ""
+    last_tooluse_summary: str = ""
+    solution_summary: str = "Not ready yet"
+    confidence: Union[str, float] = "0.0"
+
+
 class Perception:
     def __init__(self, prompt_template_path: str):
         self.prompt_template_path = prompt_template_path
         self.prompt_template = read_yaml_template(prompt_template_path)
 
-    def get_perception_output(self, context: dict) -> dict:
+    async def get_perception_output(self, context: dict) -> dict:
 
-        for key in PerceptionContextKeys:
-            if key.value not in context:
-                raise ValueError(f"Context must contain {key.value}")
+        missing = _REQUIRED_KEYS.difference(context)
+        if missing:
+            raise ValueError(f"Context must contain {', '.join(sorted(missing))}")
 
         final_prompt = get_final_prompt(self.prompt_template, context)
 
         log_prompt("Perception", final_prompt)
-        response = generate_llm_response(
-            final_prompt["system_prompt"], final_prompt["formatted_user_prompt"]
+        response = await agenerate_llm_response(
+            final_prompt["system_prompt"], final_prompt["formatted_user_prompt"], response_schema=PerceptionResponse
         )
 
-        json_response = parse_response(response)
-        print(f"Perception Output: {json_response}")
+        try:
+            json_response = parse_response(response, PerceptionResponse)
+        except ValueError as e:
+            # Discard the malformed output and ask once more, telling the model what was wrong
+            logger.debug("Retrying perception after invalid output: %s", e)
+            discard_cached_response(
+                final_prompt["system_prompt"], final_prompt["formatted_user_prompt"], response_schema=PerceptionResponse
+            )
+            response = await agenerate_llm_response(
+                final_prompt["system_prompt"],
+                final_prompt["formatted_user_prompt"] + RETRY_HINT.format(error=e),
+                use_cache=False,
+                response_schema=PerceptionResponse,
+            )
+            json_response = parse_response(response, PerceptionResponse)
+        logger.debug("Perception Output: %s", json_response)
         return json_response
 
 
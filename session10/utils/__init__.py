@@ -4,17 +4,28 @@ Utils package for prompt and LLM utilities.
 This package provides utilities for:
 - Reading and formatting YAML prompt templates
 - Generating LLM responses using Google Gemini API
+- Serializing prompt context to JSON and decoding LLM JSON output
 """
 
 from .prompt_utils import (
     read_yaml_template,
     format_template,
+    compile_template,
+    render_template,
     get_final_prompt,
-    parse_response
+    parse_response,
+    RETRY_HINT,
 )
 
 from .llm_utils import (
     generate_llm_response,
+    agenerate_llm_response,
+    discard_cached_response,
+)
+
+from .json_utils import (
+    dumps,
+    loads,
 )
 
 from .utils import (
@@ -25,8 +36,16 @@ from .utils import (
 __all__ = [
     "read_yaml_template",
     "format_template",
+    "compile_template",
+    "render_template",
     "get_final_prompt",
+    "parse_response",
+    "RETRY_HINT",
     "generate_llm_response",
+    "agenerate_llm_response",
+    "discard_cached_response",
+    "dumps",
+    "loads",
     "log_prompt",
     "PROMPT_DIVIDER",
 ]
@@ -0,0 +1,61 @@
+"""
+JSON helpers for prompt contexts and LLM output.
+
+This module provides:
+- dumps: serialize perception/decision payloads for prompts
+- loads: decode JSON returned by the LLM
+
+Both use orjson when it is installed and the standard library otherwise.
+orjson's decode errors subclass json.JSONDecodeError, so callers can keep
+catching the stdlib exception type. The two encoders produce equivalent JSON,
+not identical text: orjson spells some floats differently (1e20 rather than
+1e+20) and writes NaN and infinity as null.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+
+def dumps(value: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    Serialize a value to a JSON string.
+
+    Non-ASCII characters are kept as-is, matching json.dumps(..., ensure_ascii=False).
+
+    Args:
+        value: JSON-serializable value
+        indent: If True, pretty-print with a two-space indent
+        default: Called for objects neither encoder supports natively and should
+            return a serializable value. orjson encodes dataclasses itself, so it
+            is not called for them when orjson is installed.
+
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(value, default=default, option=option).decode()
+    return json.dumps(value, ensure_ascii=False, indent=2 if indent else None, default=default)
+
+
+def loads(text: str) -> Any:
+    """
+    Deserialize a JSON string.
+
+    Args:
+        text: JSON text
+
+    Returns:
+        Decoded Python value
+
+    Raises:
+        json.JSONDecodeError: If the text is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
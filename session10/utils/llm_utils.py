@@ -2,37 +2,118 @@
 LLM utilities for generating responses using Google Gemini API.
 
 This module provides functions to:
-- Generate LLM responses using system and user prompts
+- Generate LLM responses using system and user prompts (sync and async)
 - Handle API key management
 - Configure model selection
+- Reuse responses for prompts already answered in this process
 """
 
+import hashlib
+import logging
 import os
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv
 from google import genai
+from google.genai import types
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SIZE = 256  # responses kept (LRU)
+_response_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+
+def _response_cache_key(
+    model: str, system_prompt: str, formatted_user_prompt: str, response_schema: Optional[type] = None
+) -> bytes:
+    """Hash the model, both prompts and the response format into a compact cache key."""
+    schema_name = response_schema.__qualname__ if response_schema is not None else ""
+    return hashlib.blake2b(
+        "\0".join((model, system_prompt, formatted_user_prompt, schema_name)).encode(), digest_size=16
+    ).digest()
+
+
+def _generation_config(system_prompt: str, response_schema: Optional[type]) -> types.GenerateContentConfig:
+    """Build the request config; a response_schema switches the model to raw JSON output."""
+    if response_schema is None:
+        return types.GenerateContentConfig(system_instruction=system_prompt)
+    return types.GenerateContentConfig(
+        system_instruction=system_prompt,
+        response_mime_type="application/json",
+        response_schema=response_schema,
+    )
+
+
+def _resolve_api_key(api_key: Optional[str]) -> str:
+    """Return the given API key, falling back to GEMINI_API_KEY."""
+    if api_key is None:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "GEMINI_API_KEY not found in environment or explicitly provided."
+            )
+    return api_key
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> genai.Client:
+    """Create one Gemini client per API key so calls reuse its connection pool."""
+    return genai.Client(api_key=api_key)
+
+
+def _get_cached_response(cache_key: bytes) -> Optional[str]:
+    """Return a cached response, marking it as recently used."""
+    text = _response_cache.get(cache_key)
+    if text is not None:
+        _response_cache.move_to_end(cache_key)
+        logger.debug("LLM cache hit")
+    return text
+
+
+def discard_cached_response(
+    system_prompt: str,
+    formatted_user_prompt: str,
+    model: str = "gemini-2.0-flash",
+    response_schema: Optional[type] = None,
+) -> None:
+    """Drop a cached response, e.g. one the caller found invalid, so it is not served again."""
+    _response_cache.pop(_response_cache_key(model, system_prompt, formatted_user_prompt, response_schema), None)
+
+
+def _cache_response(cache_key: bytes, text: str) -> None:
+    """Store a response, evicting the least recently used one if full."""
+    _response_cache[cache_key] = text
+    _response_cache.move_to_end(cache_key)
+    if len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
 
 def generate_llm_response(
     system_prompt: str,
     formatted_user_prompt: str,
     api_key: Optional[str] = None,
     model: str = "gemini-2.0-flash",
+    use_cache: bool = True,
+    response_schema: Optional[type] = None,
 ) -> str:
     """
     Generate a response from the LLM using the system prompt and formatted user prompt.
 
-    Uses Google Gemini API with structured role-based messages for proper separation
-    of system and user content.
+    Uses Google Gemini API with the system prompt passed as a system instruction,
+    separate from the user content.
 
     Args:
         system_prompt: System prompt string (instructions for the model)
         formatted_user_prompt: Formatted user prompt string (actual query/input)
         api_key: Gemini API key. If None, uses GEMINI_API_KEY environment variable
         model: Model name to use (default: gemini-2.0-flash)
+        use_cache: If False, always call the API (the fresh response is still cached)
+        response_schema: Optional pydantic model; the model then replies with raw JSON
+            (response_mime_type="application/json") constrained to this schema
 
     Returns:
         Response text from the LLM (stripped of leading/trailing whitespace)
@@ -48,21 +129,68 @@ def generate_llm_response(
         ... )
         >>> print(response)
     """
-    # Get API key from parameter or environment
-    if api_key is None:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "GEMINI_API_KEY not found in environment or explicitly provided."
-            )
+    client = _get_client(_resolve_api_key(api_key))
 
-    # Initialize Gemini client
-    client = genai.Client(api_key=api_key)
+    # Identical (model, system, user) prompts get the response already received
+    cache_key = _response_cache_key(model, system_prompt, formatted_user_prompt, response_schema)
+    if use_cache and (cached := _get_cached_response(cache_key)) is not None:
+        return cached
 
-    # Combine system and user prompts
-    contents = f"{system_prompt}\n\n{formatted_user_prompt}"
+    # Keep the static system prompt separate from the per-turn user prompt so the
+    # provider sees an identical prefix across turns and can reuse it
+    config = _generation_config(system_prompt, response_schema)
 
     # Generate response
-    response = client.models.generate_content(model=model, contents=contents)
+    response = client.models.generate_content(
+        model=model, contents=formatted_user_prompt, config=config
+    )
+
+    text = response.text.strip()
+    _cache_response(cache_key, text)
+    return text
+
+
+async def agenerate_llm_response(
+    system_prompt: str,
+    formatted_user_prompt: str,
+    api_key: Optional[str] = None,
+    model: str = "gemini-2.0-flash",
+    use_cache: bool = True,
+    response_schema: Optional[type] = None,
+) -> str:
+    """
+    Async version of generate_llm_response using the Gemini async client.
+
+    The request runs on the event loop instead of blocking it, and shares the
+    response cache with generate_llm_response.
+
+    Args:
+        system_prompt: System prompt string (instructions for the model)
+        formatted_user_prompt: Formatted user prompt string (actual query/input)
+        api_key: Gemini API key. If None, uses GEMINI_API_KEY environment variable
+        model: Model name to use (default: gemini-2.0-flash)
+        use_cache: If False, always call the API (the fresh response is still cached)
+        response_schema: Optional pydantic model; the model then replies with raw JSON
+            (response_mime_type="application/json") constrained to this schema
+
+    Returns:
+        Response text from the LLM (stripped of leading/trailing whitespace)
+
+    Raises:
+        ValueError: If API key is not provided and not found in environment
+        Exception: If API call fails (network error, API error, etc.)
+    """
+    client = _get_client(_resolve_api_key(api_key))
+
+    cache_key = _response_cache_key(model, system_prompt, formatted_user_prompt, response_schema)
+    if use_cache and (cached := _get_cached_response(cache_key)) is not None:
+        return cached
+
+    config = _generation_config(system_prompt, response_schema)
+    response = await client.aio.models.generate_content(
+        model=model, contents=formatted_user_prompt, config=config
+    )
 
-    return response.text.strip()
+    text = response.text.strip()
+    _cache_response(cache_key, text)
+    return text
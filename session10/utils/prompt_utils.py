@@ -7,40 +7,83 @@ This module provides functions to:
 - Generate final prompts from templates
 """
 
+import os
+import re
 import yaml
-from pathlib import Path
-from typing import Dict, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Type
 import json
 
+from pydantic import BaseModel, ValidationError
 
-def read_yaml_template(yaml_path: str = "prompts/perception_prompt.yaml") -> Dict[str, str]:
+from .json_utils import loads
+
+
+# libyaml's C loader parses several times faster; fall back to the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def read_yaml_template(yaml_path: str = "prompts/perception_prompt.yaml") -> Mapping[str, Any]:
     """
     Read the YAML template file and extract system_prompt and user_prompt.
 
+    Parsed templates are cached by path and modification time, so repeated
+    Perception/Decision construction only re-parses a file after it changes.
+
     Args:
         yaml_path: Path to the YAML template file
 
     Returns:
-        Dictionary with 'system_prompt' and 'user_prompt' keys
+        Read-only mapping with 'system_prompt' and 'user_prompt' keys, plus
+        'placeholders': the {{variable}} names the user prompt references
 
     Raises:
         FileNotFoundError: If the YAML file doesn't exist
         yaml.YAMLError: If the YAML file is invalid
     """
-    yaml_file = Path(yaml_path)
-    if not yaml_file.exists():
-        raise FileNotFoundError(f"YAML template not found at {yaml_path}")
+    # One stat serves as both the existence check and the cache key
+    try:
+        mtime_ns = os.stat(yaml_path).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"YAML template not found at {yaml_path}") from None
 
-    with open(yaml_file, "r", encoding="utf-8") as f:
-        template = yaml.safe_load(f)
+    return _load_yaml_template(os.fspath(yaml_path), mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _load_yaml_template(yaml_path: str, mtime_ns: int) -> Mapping[str, Any]:
+    # Read the raw bytes in one go and let the (C) loader parse them from memory
+    fd = os.open(yaml_path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    try:
+        chunks = []
+        while chunk := os.read(fd, 1 << 16):
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    template = yaml.load(b"".join(chunks), Loader=_YAML_LOADER)
 
     if template is None:
         raise ValueError(f"YAML file {yaml_path} is empty or invalid")
 
-    return {
+    user_prompt = template.get("user_prompt", "")
+    user_segments = compile_template(user_prompt)
+    return MappingProxyType({
         "system_prompt": template.get("system_prompt", ""),
-        "user_prompt": template.get("user_prompt", ""),
-    }
+        "user_prompt": user_prompt,
+        "user_segments": user_segments,
+        "placeholders": frozenset(user_segments[1::2]),
+    })
+
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+_JSON_BLOCK_PATTERN = re.compile(r"```json(.*?)```", re.DOTALL)
+
+# Appended to the user prompt when an LLM response fails parse_response
+RETRY_HINT = (
+    "\n\nYour previous response could not be used: {error}\n"
+    "Reply again with JSON matching the required output format."
+)
 
 
 def format_template(template: str, context: Dict[str, str]) -> str:
@@ -61,15 +104,55 @@ def format_template(template: str, context: Dict[str, str]) -> str:
     if not template:
         return template
 
-    formatted = template
-    for key, value in context.items():
-        placeholder = f"{{{{{key}}}}}"
-        formatted = formatted.replace(placeholder, str(value))
-    return formatted
+    # One pass over the template; placeholders without a context value are left as-is
+    def substitute(match: re.Match) -> str:
+        key = match.group(1)
+        return str(context[key]) if key in context else match.group(0)
+
+    return _PLACEHOLDER_PATTERN.sub(substitute, template)
+
+
+def compile_template(template: str) -> tuple:
+    """
+    Split a {{variable}} template into literal text and placeholder names once.
+
+    Args:
+        template: Template string with {{variable}} placeholders
+
+    Returns:
+        Tuple alternating literal text and placeholder names, starting and
+        ending with literal text (placeholder names are at the odd indices)
+
+    Example:
+        >>> compile_template("Hello {{name}}!")
+        ('Hello ', 'name', '!')
+    """
+    return tuple(_PLACEHOLDER_PATTERN.split(template or ""))
+
+
+def render_template(segments: tuple, context: Dict[str, str]) -> str:
+    """
+    Render a template compiled by compile_template with provided context.
+
+    Same result as format_template on the original string, without scanning
+    the template text again.
+
+    Args:
+        segments: Output of compile_template
+        context: Dictionary with variable names as keys and values to substitute
+
+    Returns:
+        Formatted string with placeholders replaced
+    """
+    parts = list(segments)
+    for i in range(1, len(parts), 2):
+        key = parts[i]
+        parts[i] = str(context[key]) if key in context else f"{{{{{key}}}}}"
+    return "".join(parts)
 
 
 def get_final_prompt(
-    template: Dict[str, str],
+    template: Mapping[str, Any],
     context: Optional[Dict[str, str]] = None,
     verbose: bool = False,
 ) -> Dict[str, str]:
@@ -93,7 +176,10 @@ def get_final_prompt(
         raise ValueError("context parameter is required")
 
     # Format the user prompt with context
-    formatted_user_prompt = format_template(template["user_prompt"], context)
+    if "user_segments" in template:
+        formatted_user_prompt = render_template(template["user_segments"], context)
+    else:
+        formatted_user_prompt = format_template(template["user_prompt"], context)
 
     # Optionally print prompts
     if verbose:
@@ -112,39 +198,45 @@ def get_final_prompt(
         "formatted_user_prompt": formatted_user_prompt,
     }
 
-def parse_response(response: str) -> dict:
+def parse_response(response: str, schema: Optional[Type[BaseModel]] = None) -> dict:
     """
     Parse the response from the LLM into a dictionary.
+
+    Accepts either JSON inside a ```json code block or a raw JSON object, as
+    returned when the request sets response_mime_type="application/json".
     
     Args:
         response: LLM response string that may contain JSON in a code block
+        schema: Optional pydantic model; the JSON block is decoded and validated
+            against it in one pass and returned as model_dump() (defaults filled in)
         
     Returns:
         Dictionary parsed from the JSON block
         
     Raises:
-        ValueError: If the response doesn't contain a valid JSON code block
-        json.JSONDecodeError: If the JSON block is invalid JSON
+        ValueError: If the response doesn't contain a valid JSON code block, or
+            the block does not match schema
+        json.JSONDecodeError: If the JSON block is invalid JSON (without schema)
     """
     try:
-        # Extract JSON block from markdown code block
-        if "```json" not in response:
-            raise ValueError("Response does not contain a ```json code block")
-        
-        parts = response.split("```json")
-        if len(parts) < 2:
-            raise ValueError("Could not find JSON code block start marker")
-        
-        json_part = parts[1]
-        if "```" not in json_part:
-            raise ValueError("Could not find JSON code block end marker")
-        
-        json_block = json_part.split("```")[0].strip()
+        json_block = response.strip()
+        if not json_block.startswith("{"):
+            # Extract JSON block from markdown code block in a single regex pass
+            match = _JSON_BLOCK_PATTERN.search(response)
+            if match is None:
+                if "```json" not in response:
+                    raise ValueError("Response does not contain a ```json code block")
+                raise ValueError("Could not find JSON code block end marker")
+
+            json_block = match.group(1).strip()
         
         if not json_block:
             raise ValueError("JSON code block is empty")
         
-        output = json.loads(json_block)
+        if schema is not None:
+            return schema.model_validate_json(json_block).model_dump()
+
+        output = loads(json_block)
         return output
         
     except json.JSONDecodeError as e:
@@ -153,5 +245,7 @@ def parse_response(response: str) -> dict:
             e.doc,
             e.pos
         ) from e
+    except ValidationError as e:
+        raise ValueError(f"Error parsing response: {schema.__name__} validation failed: {e}") from e
     except (IndexError, ValueError) as e:
         raise ValueError(f"Error parsing response: {str(e)}") from e
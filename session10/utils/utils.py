@@ -1,20 +1,38 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
 PROMPT_DIVIDER = "─" * 72
 
 
+@lru_cache(maxsize=None)
+def _prompt_header(agent_label: str, section: str) -> str:
+    return f"\n{PROMPT_DIVIDER}\n[{agent_label}] {section}\n{PROMPT_DIVIDER}"
+
+
 def log_prompt(agent_label: str, final_prompt: dict, *, show_system: bool = False) -> None:
     """
-    Print formatted system/user prompts for debugging.
+    Log formatted system/user prompts for debugging.
+
+    Prompts are logged at INFO level; nothing is formatted when this module's
+    logger is above INFO.
 
     Args:
         agent_label: Short label such as "Decision" or "Perception".
         final_prompt: Dict with 'system_prompt' and 'formatted_user_prompt'.
-        show_system: Whether to print the system prompt contents.
+        show_system: Whether to log the system prompt contents.
     """
-    divider = PROMPT_DIVIDER
-    if show_system:
-        print(f"\n{divider}\n[{agent_label}] SYSTEM PROMPT\n{divider}")
-        print(final_prompt.get("system_prompt", "").strip())
+    if not logger.isEnabledFor(logging.INFO):
+        return
 
-    print(f"\n{divider}\n[{agent_label}] USER PROMPT\n{divider}")
-    print(f"{final_prompt.get('formatted_user_prompt', '').strip()}\n")
+    if show_system:
+        logger.info(
+            "%s\n%s", _prompt_header(agent_label, "SYSTEM PROMPT"), final_prompt.get("system_prompt", "").strip()
+        )
 
+    logger.info(
+        "%s\n%s\n",
+        _prompt_header(agent_label, "USER PROMPT"),
+        final_prompt.get("formatted_user_prompt", "").strip(),
+    )
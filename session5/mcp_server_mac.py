@@ -3,135 +3,152 @@ from mcp.server.fastmcp import FastMCP, Image
 from mcp.server.fastmcp.prompts import base
 from mcp.types import TextContent
 from mcp import types
-from PIL import Image as PILImage
+import asyncio
+import io
 import math
 import sys
 import subprocess
-import time
-import shutil
 import os
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+# PIL and reportlab are imported inside the tools that use them, so starting
+# the server (and every math-only session) doesn't pay for loading them
 
 # instantiate an MCP server client
 mcp = FastMCP("Calculator")
 
+# Tool-call traces are off unless MCP_DEBUG is set; with the stdio transport,
+# stdout is the protocol stream
+_DEBUG = bool(os.environ.get("MCP_DEBUG"))
+
+
+def _trace(message: str) -> None:
+    if _DEBUG:
+        print(message, file=sys.stderr)
+
+
 # Global variables
 current_pdf_path = None
 pdf_elements = []  # Store elements to draw on PDF
 
+# Lookup tables for the small inputs the agent typically asks for
+_FACTORIALS = tuple(math.factorial(i) for i in range(21))
+_FIBONACCI = (0, 1)
+for _ in range(2, 32):
+    _FIBONACCI += (_FIBONACCI[-1] + _FIBONACCI[-2],)
+
 # DEFINE TOOLS
 
 #addition tool
 @mcp.tool()
 def add(a: int, b: int) -> int:
     """Add two numbers"""
-    print("CALLED: add(a: int, b: int) -> int:")
+    _trace("CALLED: add(a: int, b: int) -> int:")
     return int(a + b)
 
 @mcp.tool()
 def add_list(l: list) -> int:
     """Add all numbers in a list"""
-    print("CALLED: add(l: list) -> int:")
+    _trace("CALLED: add(l: list) -> int:")
     return sum(l)
 
 # subtraction tool
 @mcp.tool()
 def subtract(a: int, b: int) -> int:
     """Subtract two numbers"""
-    print("CALLED: subtract(a: int, b: int) -> int:")
+    _trace("CALLED: subtract(a: int, b: int) -> int:")
     return int(a - b)
 
 # multiplication tool
 @mcp.tool()
 def multiply(a: int, b: int) -> int:
     """Multiply two numbers"""
-    print("CALLED: multiply(a: int, b: int) -> int:")
+    _trace("CALLED: multiply(a: int, b: int) -> int:")
     return int(a * b)
 
 #  division tool
 @mcp.tool() 
 def divide(a: int, b: int) -> float:
     """Divide two numbers"""
-    print("CALLED: divide(a: int, b: int) -> float:")
+    _trace("CALLED: divide(a: int, b: int) -> float:")
     return float(a / b)
 
 # power tool
 @mcp.tool()
 def power(a: int, b: int) -> int:
     """Power of two numbers"""
-    print("CALLED: power(a: int, b: int) -> int:")
+    _trace("CALLED: power(a: int, b: int) -> int:")
     return int(a ** b)
 
 # square root tool
 @mcp.tool()
 def sqrt(a: int) -> float:
     """Square root of a number"""
-    print("CALLED: sqrt(a: int) -> float:")
+    _trace("CALLED: sqrt(a: int) -> float:")
     return float(a ** 0.5)
 
 # cube root tool
 @mcp.tool()
 def cbrt(a: int) -> float:
     """Cube root of a number"""
-    print("CALLED: cbrt(a: int) -> float:")
+    _trace("CALLED: cbrt(a: int) -> float:")
     return float(a ** (1/3))
 
 # factorial tool
 @mcp.tool()
 def factorial(a: int) -> int:
     """factorial of a number"""
-    print("CALLED: factorial(a: int) -> int:")
+    _trace("CALLED: factorial(a: int) -> int:")
+    if 0 <= a < len(_FACTORIALS):
+        return _FACTORIALS[a]
     return int(math.factorial(a))
 
 # log tool
 @mcp.tool()
 def log(a: int) -> float:
     """log of a number"""
-    print("CALLED: log(a: int) -> float:")
+    _trace("CALLED: log(a: int) -> float:")
     return float(math.log(a))
 
 # remainder tool
 @mcp.tool()
 def remainder(a: int, b: int) -> int:
     """remainder of two numbers divison"""
-    print("CALLED: remainder(a: int, b: int) -> int:")
+    _trace("CALLED: remainder(a: int, b: int) -> int:")
     return int(a % b)
 
 # sin tool
 @mcp.tool()
 def sin(a: int) -> float:
     """sin of a number"""
-    print("CALLED: sin(a: int) -> float:")
+    _trace("CALLED: sin(a: int) -> float:")
     return float(math.sin(a))
 
 # cos tool
 @mcp.tool()
 def cos(a: int) -> float:
     """cos of a number"""
-    print("CALLED: cos(a: int) -> float:")
+    _trace("CALLED: cos(a: int) -> float:")
     return float(math.cos(a))
 
 # tan tool
 @mcp.tool()
 def tan(a: int) -> float:
     """tan of a number"""
-    print("CALLED: tan(a: int) -> float:")
+    _trace("CALLED: tan(a: int) -> float:")
     return float(math.tan(a))
 
 # mine tool
 @mcp.tool()
 def mine(a: int, b: int) -> int:
     """special mining tool"""
-    print("CALLED: mine(a: int, b: int) -> int:")
+    _trace("CALLED: mine(a: int, b: int) -> int:")
     return int(a - b - b)
 
 @mcp.tool()
 def create_thumbnail(image_path: str) -> Image:
     """Create a thumbnail from an image"""
-    print("CALLED: create_thumbnail(image_path: str) -> Image:")
+    _trace("CALLED: create_thumbnail(image_path: str) -> Image:")
+    from PIL import Image as PILImage
+
     img = PILImage.open(image_path)
     img.thumbnail((100, 100))
     return Image(data=img.tobytes(), format="png")
@@ -139,33 +156,50 @@ def create_thumbnail(image_path: str) -> Image:
 @mcp.tool()
 def strings_to_chars_to_int(string: str) -> list[int]:
     """Return the ASCII values of the characters in a word"""
-    print("CALLED: strings_to_chars_to_int(string: str) -> list[int]:")
-    return [int(ord(char)) for char in string]
+    _trace("CALLED: strings_to_chars_to_int(string: str) -> list[int]:")
+    if string.isascii():
+        # Each byte of an ASCII encoding is the character's code point
+        return list(string.encode("ascii"))
+    return [ord(char) for char in string]
 
 @mcp.tool()
 def int_list_to_exponential_sum(int_list: list) -> str:
     """Return sum of exponentials of numbers in a list (formatted to 2 decimal places)"""
-    print("CALLED: int_list_to_exponential_sum(int_list: list) -> str:")
-    result = sum(math.exp(i) for i in int_list)
+    _trace("CALLED: int_list_to_exponential_sum(int_list: list) -> str:")
+    if not int_list:
+        return f"{0.0:.2e}"
+    # Factor out the largest exponent so every summed term lies in (0, 1]
+    largest = max(int_list)
+    result = math.exp(largest) * sum(math.exp(i - largest) for i in int_list)
     # Format large numbers in scientific notation with 2 decimal places
     return f"{result:.2e}"
 
 @mcp.tool()
 def fibonacci_numbers(n: int) -> list:
     """Return the first n Fibonacci Numbers"""
-    print("CALLED: fibonacci_numbers(n: int) -> list:")
+    _trace("CALLED: fibonacci_numbers(n: int) -> list:")
     if n <= 0:
         return []
-    fib_sequence = [0, 1]
-    for _ in range(2, n):
-        fib_sequence.append(fib_sequence[-1] + fib_sequence[-2])
-    return fib_sequence[:n]
+    if n <= len(_FIBONACCI):
+        return list(_FIBONACCI[:n])
+    # Allocate the whole list up front and continue from the end of the table,
+    # carrying the last two values in locals instead of indexing back into the list
+    fib_sequence = [0] * n
+    fib_sequence[:len(_FIBONACCI)] = _FIBONACCI
+    a, b = _FIBONACCI[-2], _FIBONACCI[-1]
+    for i in range(len(_FIBONACCI), n):
+        a, b = b, a + b
+        fib_sequence[i] = b
+    return fib_sequence
 
 @mcp.tool()
 async def open_preview_with_pdf() -> dict:
     """Create a new PDF for drawing and open it in Preview"""
     global current_pdf_path, pdf_elements
     try:
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import letter
+
         # Create a unique filename for this session
         import uuid
         unique_id = str(uuid.uuid4())[:8]
@@ -181,9 +215,12 @@ async def open_preview_with_pdf() -> dict:
         c.showPage()
         c.save()
         
-        # Open the PDF with Preview
-        subprocess.run(["open", "-a", "Preview", current_pdf_path], check=True)
-        time.sleep(1)  # Brief wait for Preview to open
+        # Open the PDF with Preview; `open` returns as soon as Preview is launched,
+        # and awaiting it keeps the event loop free in the meantime
+        open_cmd = ["open", "-a", "Preview", current_pdf_path]
+        proc = await asyncio.create_subprocess_exec(*open_cmd)
+        if await proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, open_cmd)
         
         return {
             "content": [
@@ -294,12 +331,25 @@ async def _regenerate_pdf():
     
     if not current_pdf_path:
         return
+
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
     
-    # Create new PDF with all elements
-    c = canvas.Canvas(current_pdf_path, pagesize=letter)
+    # Render into memory with compressed page streams, then swap the file in
+    # with one write so Preview never sees a half-written PDF
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, pageCompression=1)
     width, height = letter
     c.setTitle("MCP Drawing Canvas")
     
+    # Every element uses the same style, so set the graphics state once per render
+    # instead of emitting it again for each element
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(2)
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.black)
+
     # Draw all elements
     for element in pdf_elements:
         if element["type"] == "rectangle":
@@ -310,8 +360,6 @@ async def _regenerate_pdf():
             pdf_y2 = height - y2
             
             # Draw rectangle
-            c.setStrokeColor(colors.black)
-            c.setLineWidth(2)
             c.rect(x1, min(pdf_y1, pdf_y2), abs(x2-x1), abs(pdf_y1-pdf_y2), stroke=1, fill=0)
             
         elif element["type"] == "text":
@@ -320,13 +368,16 @@ async def _regenerate_pdf():
             pdf_y = height - y
             
             # Draw text
-            c.setFont("Helvetica", 12)
-            c.setFillColor(colors.black)
             c.drawString(x, pdf_y, element["text"])
     
     c.showPage()
     c.save()
 
+    tmp_path = f"{current_pdf_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, current_pdf_path)
+
 @mcp.tool()
 async def save_pdf() -> dict:
     """Save the current PDF (already saved automatically)"""
@@ -367,7 +418,7 @@ async def save_pdf() -> dict:
 @mcp.resource("greeting://{name}")
 def get_greeting(name: str) -> str:
     """Get a personalized greeting"""
-    print("CALLED: get_greeting(name: str) -> str:")
+    _trace("CALLED: get_greeting(name: str) -> str:")
     return f"Hello, {name}!"
 
 
@@ -375,7 +426,7 @@ def get_greeting(name: str) -> str:
 @mcp.prompt()
 def review_code(code: str) -> str:
     return f"Please review this code:\n\n{code}"
-    print("CALLED: review_code(code: str) -> str:")
+    _trace("CALLED: review_code(code: str) -> str:")
 
 
 @mcp.prompt()
@@ -23,15 +23,12 @@ async def generate_with_timeout(client, prompt, timeout=10):
     """Generate content with a timeout"""
     print("Starting LLM generation...")
     try:
-        # Convert the synchronous generate_content call to run in a thread
-        loop = asyncio.get_event_loop()
+        # Run the synchronous generate_content call in a worker thread
         response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None, 
-                lambda: client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt
-                )
+            asyncio.to_thread(
+                client.models.generate_content,
+                model="gemini-2.0-flash",
+                contents=prompt,
             ),
             timeout=timeout
         )
@@ -17,6 +17,8 @@ api_key = os.getenv("GEMINI_API_KEY")
 client = genai.Client(api_key=api_key)
 
 max_iterations = 20  # Increased to allow for drawing operations
+full_result_entries = 4  # Older tool results are cut down before being resent
+trimmed_result_chars = 200
 iteration = 0
 response_history = {}
 
@@ -76,6 +78,7 @@ async def main():
                 
                 
                 system_prompt = system_prompt.format(tools_description=tools_description)
+                prompt_prefix = f"{system_prompt}\n\nQuery: "
                 
                 query = """Find the ASCII values of characters in BHARAT and then return sum of exponentials of those values. wherein you draw a rectangle and place the result inside it Mark this as first result in the Rectangle and do the same for another word INDIA and put it in the same rectangle just beneath it, for each result also put the actual word as well as the result inside the rectangle"""
                 print("\033[95m🔄 Starting iteration loop...\033[0m")
@@ -87,22 +90,26 @@ async def main():
                     print(f"\n\033[1m\033[36m{'='*50}\033[0m")
                     print(f"\033[1m\033[35m🔄 Iteration {iteration + 1}/{max_iterations}\033[0m")
                     print(f"\033[1m\033[36m{'='*50}\033[0m")
+                    # Keep function name/parameters for every step but only the last few full
+                    # results; the entry that just dropped out of that window gets trimmed
+                    old_entry = response_history.get(iteration - full_result_entries - 1)
+                    if old_entry and "result" in old_entry:
+                        old_result = str(old_entry["result"])
+                        if len(old_result) > trimmed_result_chars:
+                            old_entry["result"] = old_result[:trimmed_result_chars] + "..."
                     if not response_history:
                         current_query = f"New Task: {query}"
 
                     else:
                         # create a new query by appending the response history to the query
-                        current_query = ""
-
-                        for key, value in response_history.items():
-                            current_query = current_query + f"\n\nResponse History {key}: {value}"
-
-                        current_query = current_query + "\n\nWhat should I do next?"
+                        history = [f"\n\nResponse History {key}: {value}" for key, value in response_history.items()]
+                        history.append("\n\nWhat should I do next?")
+                        current_query = "".join(history)
 
 
                     # Get model's response with timeout
                     print("\033[93m🤖 Preparing to generate LLM response...\033[0m")
-                    prompt = f"{system_prompt}\n\nQuery: {current_query}"
+                    prompt = prompt_prefix + current_query
                     
                     # Print the prompt only for the first iteration
                     if iteration == 0:
@@ -1,21 +1,41 @@
 import re
 import json
 import asyncio
+from collections import OrderedDict
 from concurrent.futures import TimeoutError
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+_JSON_RE = re.compile(r"```json\n(.*?)\n```", re.DOTALL)
+
 def parse_llm_response(response):
     try:
         # Try to extract JSON from markdown code block
-        json_object = re.search(r"```json\n(.*?)\n```", response, re.DOTALL)
+        json_object = _JSON_RE.search(response)
         if json_object:
             json_str = json_object.group(1)
-            parsed_response = json.loads(json_str)
+            parsed_response = orjson.loads(json_str) if orjson is not None else json.loads(json_str)
             return parsed_response
     except Exception as e:
         print(f"Error parsing LLM response: {e}")
         return None
 
+# Formatted descriptions keyed by (tool name, id of its input schema). The cached
+# tools list keeps those schemas alive, so their ids cannot be reused.
+_TOOLS_DESC_CACHE: "OrderedDict[tuple, tuple[list, str]]" = OrderedDict()
+_TOOLS_DESC_CACHE_SIZE = 8  # tool lists kept (LRU)
+
+
 def get_tools_description(tools):
+    cache_key = tuple((getattr(tool, 'name', None), id(getattr(tool, 'inputSchema', None))) for tool in tools)
+    cached = _TOOLS_DESC_CACHE.get(cache_key)
+    if cached is not None:
+        _TOOLS_DESC_CACHE.move_to_end(cache_key)
+        return cached[1]
+
     try:
         # First, let's inspect what a tool object looks like
         # if tools:
@@ -23,6 +43,8 @@ def get_tools_description(tools):
         #     print(f"First tool example: {tools[0]}")
         
         tools_description = []
+        append = tools_description.append
+        had_errors = False
         for i, tool in enumerate(tools):
             try:
                 # Get tool properties
@@ -32,23 +54,26 @@ def get_tools_description(tools):
                 
                 # Format the input schema in a more readable way
                 if 'properties' in params:
-                    param_details = []
-                    for param_name, param_info in params['properties'].items():
-                        param_type = param_info.get('type', 'unknown')
-                        param_details.append(f"{param_name}: {param_type}")
-                    params_str = ', '.join(param_details)
+                    params_str = ', '.join(
+                        f"{param_name}: {param_info.get('type', 'unknown')}"
+                        for param_name, param_info in params['properties'].items()
+                    )
                 else:
                     params_str = 'no parameters'
 
-                tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
-                tools_description.append(tool_desc)
-                print(f"Added description for tool: {tool_desc}")
+                append(f"{i+1}. {name}({params_str}) - {desc}")
             except Exception as e:
                 print(f"Error processing tool {i}: {e}")
-                tools_description.append(f"{i+1}. Error processing tool")
+                append(f"{i+1}. Error processing tool")
+                had_errors = True
         
         tools_description = "\n".join(tools_description)
         print("Successfully created tools description")
+        # A tool that failed may work next time, so only complete descriptions are cached
+        if not had_errors:
+            _TOOLS_DESC_CACHE[cache_key] = (list(tools), tools_description)
+            if len(_TOOLS_DESC_CACHE) > _TOOLS_DESC_CACHE_SIZE:
+                _TOOLS_DESC_CACHE.popitem(last=False)
         return tools_description
     except Exception as e:
         print(f"Error creating tools description: {e}")
@@ -60,15 +85,12 @@ async def generate_with_timeout(client, prompt, timeout=20):
     """Generate content with a timeout"""
     print("Starting LLM generation...")
     try:
-        # Convert the synchronous generate_content call to run in a thread
-        loop = asyncio.get_event_loop()
+        # Run the synchronous generate_content call in a worker thread
         response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None, 
-                lambda: client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt
-                )
+            asyncio.to_thread(
+                client.models.generate_content,
+                model="gemini-2.0-flash",
+                contents=prompt,
             ),
             timeout=timeout
         )